@@ -1,41 +1,1227 @@
-from sklearn.preprocessing import MinMaxScaler
+import heapq
+import itertools
+import math
+import time
 
+import numpy as np
+import pandas as pd
+
+from instrumentation import count, traced
+
+SCORE_METRICS = ["NPV", "IRR", "Payback", "Risk"]
+
+# Decision labels, indexed by decision_codes(): rejected for want of
+# budget, funded, or never fundable because its objective value is negative
+DECISIONS = ["Rejected (Budget Constraint)", "Selected (Funded)", "Rejected (Negative Score)"]
+REJECTED, FUNDED, NEGATIVE = DECISIONS
+
+# Branch-and-bound stops once within this share of the LP bound: the last
+# 0.01% can take minutes to prove on tens of thousands of projects
+GAP_TOLERANCE = 1e-4
+
+def decision_codes(selected, values):
+    """Index into DECISIONS of each project, from the funded flags and objective values"""
+    return np.where(selected, 1, np.where(values < 0, 2, 0)).astype(np.int8)
+
+def _decisions(selected, values):
+    return np.asarray(DECISIONS)[decision_codes(selected, values)]
+
+def _slowest(payback):
+    """Longest finite payback, NaN when no project pays back"""
+    finite = payback[np.isfinite(payback)]
+    return finite.max() if len(finite) else np.nan
+
+def _fill_payback(payback, slowest):
+    """Projects that never pay back rank just behind the slowest one that does"""
+    return np.where(np.isinf(payback), slowest + 1 if not np.isnan(slowest) else 1, payback)
+
+def _normalise(values, lo, hi):
+    """
+    Min-max scaling with the same arithmetic as sklearn's MinMaxScaler,
+    so rows rescored on their own match a full refit bit for bit.
+    """
+    span = hi - lo
+    scale = 1 / (1.0 if span < 10 * np.finfo(float).eps else span)
+    return values * scale + (0 - lo * scale)
+
+def _weighted_score(npv_n, irr_n, payback_n, risk_n, risk):
+    score = (
+        0.40 * npv_n +
+        0.25 * irr_n -
+        0.20 * risk_n +
+        0.15 * (1 - payback_n)
+    )
+
+    # Strategic risk penalty
+    return score * (1 - 0.2 * risk)
+
+def _score_rows(metrics, bounds, slowest):
+    """Normalised metrics and Score for a block of rows given the column extremes"""
+    metrics = dict(metrics, Payback=_fill_payback(metrics["Payback"], slowest))
+    out = {f"{m}_n": _normalise(metrics[m], *bounds[m]) for m in SCORE_METRICS}
+    out["Score"] = _weighted_score(
+        out["NPV_n"], out["IRR_n"], out["Payback_n"], out["Risk_n"], metrics["Risk"]
+    )
+    return out
+
+@traced("allocation_model.score_projects")
 def score_projects(df):
     """
     Weighted multi-criteria scoring model
     incorporating return, risk, and payback.
     """
-    scaler = MinMaxScaler()
-    df[["NPV_n","IRR_n","Payback_n","Risk_n"]] = scaler.fit_transform(
-        df[["NPV","IRR","Payback","Risk"]]
-    )
+    count("rows.scored", len(df))
 
-    df["Score"] = (
-        0.40 * df["NPV_n"] +
-        0.25 * df["IRR_n"] -
-        0.20 * df["Risk_n"] +
-        0.15 * (1 - df["Payback_n"])
-    )
+    if df.empty:
+        raise ValueError("Cannot score an empty project list")
 
-    # Strategic risk penalty
-    df["Score"] *= (1 - 0.2 * df["Risk"])
+    df = df.copy()
+    metrics = {m: df[m].to_numpy(dtype=float) for m in SCORE_METRICS}
+    slowest = _slowest(metrics["Payback"])
+
+    filled = _fill_payback(metrics["Payback"], slowest)
+    bounds = {m: (np.nanmin(metrics[m]), np.nanmax(metrics[m])) for m in ["NPV", "IRR", "Risk"]}
+    bounds["Payback"] = (np.nanmin(filled), np.nanmax(filled))
+
+    for col, values in _score_rows(metrics, bounds, slowest).items():
+        df[col] = values
 
     return df
 
-def allocate(df, budget=100):
+class IncrementalScorer:
     """
-    Capital allocation under a fixed budget constraint.
+    Keeps Score current while projects are added, removed or edited.
+
+    Each metric's minimum and maximum come from a sorted snapshot plus
+    heaps of later edits, both with lazy deletion. An edit rescores only
+    the rows it touches unless it moves an extreme (or the slowest finite
+    payback), in which case every row is renormalised. Scores always equal
+    score_projects on the same rows.
+    """
+
+    def __init__(self, df, key="Project_ID"):
+        self.key = key
+        self.frame = score_projects(df).set_index(key, drop=False)
+        self.frame.index.name = None
+        if not self.frame.index.is_unique:
+            raise ValueError(f"Duplicate {key} values")
+        self.full_rescores = 0
+        self._seq = itertools.count()
+        self._values = {}
+        self._sorted = {}
+        self._heaps = {}
+        keys = self.frame.index.to_numpy(dtype=object)
+        for m in SCORE_METRICS:
+            values = self.frame[m].to_numpy(dtype=float)
+            self._values[m] = dict(zip(keys, values.tolist()))
+            self._rebuild(m, keys, values)
+        self._never = {k for k, v in self._values["Payback"].items() if math.isinf(v)}
+        self._state = self._extremes()
+
+    def _rebuild(self, metric, keys=None, values=None):
+        """
+        Snapshot a metric as one sorted array read from both ends, plus
+        empty heaps for later edits. Entries whose key has since changed
+        value are skipped lazily, so deletions never touch the snapshot.
+        """
+        if keys is None:
+            keys = np.array(list(self._values[metric]), dtype=object)
+            values = np.fromiter(self._values[metric].values(), dtype=float, count=len(keys))
+        live = np.flatnonzero(np.isfinite(values))
+        order = live[np.argsort(values[live], kind="stable")]
+        self._sorted[metric] = [values[order], keys[order], 0, len(order) - 1]
+        self._heaps[metric] = ([], [])
+
+    def _push(self, metric, key, value):
+        self._values[metric][key] = value
+        if metric == "Payback":
+            (self._never.add if math.isinf(value) else self._never.discard)(key)
+        if math.isfinite(value):
+            low, high = self._heaps[metric]
+            seq = next(self._seq)
+            heapq.heappush(low, (value, seq, key))
+            heapq.heappush(high, (-value, seq, key))
+
+    def _top(self, metric, sign):
+        """Current minimum (sign=1) or maximum (sign=-1), NaN when no value is finite"""
+        values = self._values[metric]
+        heap = self._heaps[metric][sign < 0]
+        while heap and values.get(heap[0][2]) != sign * heap[0][0]:
+            heapq.heappop(heap)
+
+        snapshot, keys, lo, hi = self._sorted[metric]
+        if sign > 0:
+            while lo <= hi and values.get(keys[lo]) != snapshot[lo]:
+                lo += 1
+            self._sorted[metric][2] = lo
+            best = snapshot[lo] if lo <= hi else np.nan
+        else:
+            while hi >= lo and values.get(keys[hi]) != snapshot[hi]:
+                hi -= 1
+            self._sorted[metric][3] = hi
+            best = snapshot[hi] if hi >= lo else np.nan
+
+        if heap and (np.isnan(best) or heap[0][0] < sign * best):
+            return sign * heap[0][0]
+        return best
+
+    def _extremes(self):
+        """Column bounds exactly as score_projects would compute them, plus the slowest payback"""
+        bounds = {}
+        for m in SCORE_METRICS:
+            # Edits pile up in the heaps; fold them into a fresh snapshot
+            # once they outnumber the live values
+            if len(self._heaps[m][0]) > len(self._values[m]) + 64:
+                self._rebuild(m)
+            bounds[m] = (self._top(m, 1), self._top(m, -1))
+
+        slowest = bounds["Payback"][1]
+        if self._never:
+            fill = slowest + 1 if not np.isnan(slowest) else 1
+            lo = bounds["Payback"][0]
+            bounds["Payback"] = (fill if np.isnan(lo) else lo, fill)
+        return bounds, slowest
+
+    def _write(self, pos, cols, values):
+        """Set a block of cells; small edits go cell by cell to avoid copying whole columns"""
+        idx = self.frame.columns.get_indexer(cols)
+        if values.size <= 256:
+            for i, p in enumerate(pos):
+                for j, c in enumerate(idx):
+                    self.frame.iat[p, c] = values[i, j]
+        else:
+            self.frame.iloc[pos, idx] = values
+
+    def _rescore(self, keys=None):
+        bounds, slowest = self._state
+        if keys is None:
+            metrics = {m: self.frame[m].to_numpy(dtype=float) for m in SCORE_METRICS}
+        else:
+            metrics = {m: np.array([self._values[m][k] for k in keys], dtype=float) for m in SCORE_METRICS}
+        scored = _score_rows(metrics, bounds, slowest)
+        if keys is None:
+            self.full_rescores += 1
+            count("scoring.full_rescore")
+            for col, values in scored.items():
+                self.frame[col] = values
+        else:
+            cols = list(scored)
+            self._write(
+                self.frame.index.get_indexer(keys), cols, np.column_stack([scored[c] for c in cols])
+            )
+        count("rows.scored", len(metrics["NPV"]))
+
+    def _refresh(self, keys):
+        state = self._extremes()
+        before = np.array([*np.ravel(list(self._state[0].values())), self._state[1]])
+        after = np.array([*np.ravel(list(state[0].values())), state[1]])
+        self._state = state
+        if np.array_equal(before, after, equal_nan=True):
+            if len(keys):
+                self._rescore(keys)
+        else:
+            self._rescore()
+
+    @traced("allocation_model.IncrementalScorer.add")
+    def add(self, rows):
+        """Score new projects; rows carry the key column and every metric"""
+        keys = rows[self.key].tolist()
+        if self.frame.index.isin(keys).any() or len(set(keys)) != len(keys):
+            raise ValueError(f"Duplicate {self.key} values")
+        rows = rows.set_index(self.key, drop=False)
+        rows.index.name = None
+        self.frame = pd.concat([self.frame, rows])
+        for m in SCORE_METRICS:
+            for k, v in zip(keys, rows[m].to_numpy(dtype=float)):
+                self._push(m, k, v)
+        self._refresh(keys)
+
+    @traced("allocation_model.IncrementalScorer.remove")
+    def remove(self, keys):
+        keys = list(keys)
+        self.frame = self.frame.drop(index=keys)
+        for m in SCORE_METRICS:
+            for k in keys:
+                del self._values[m][k]
+        self._never.difference_update(keys)
+        self._refresh([])
+
+    @traced("allocation_model.IncrementalScorer.update")
+    def update(self, rows):
+        """Apply edits; rows carry the key column and any changed columns"""
+        keys = rows[self.key].tolist()
+        missing = [k for k in keys if k not in self._values["NPV"]]
+        if missing:
+            raise KeyError(f"Unknown {self.key} values: {sorted(missing)}")
+        cols = [c for c in rows.columns if c != self.key]
+        self._write(self.frame.index.get_indexer(keys), cols, rows[cols].to_numpy())
+        for m in SCORE_METRICS:
+            if m in cols:
+                for k, v in zip(keys, rows[m].to_numpy(dtype=float)):
+                    self._push(m, k, v)
+        self._refresh(keys)
+
+    def result(self):
+        """The scored catalog in the same shape score_projects returns"""
+        return self.frame.reset_index(drop=True)
+
+def _fill(V, W, k, cap):
+    """
+    LP relaxation over sorted items k.. with capacity cap.
+    Returns the number of whole items taken after k and the bound.
+    """
+    j = np.searchsorted(W, W[k] + cap, side="right") - 1
+    bound = V[j] - V[k]
+    if j < len(V) - 1:
+        bound += (W[k] + cap - W[j]) * (V[j + 1] - V[j]) / (W[j + 1] - W[j])
+    return j, bound
+
+
+class KnapsackFrontier:
+    """
+    Optimal 0/1 selections for every capacity 0..max_capacity,
+    computed in a single dynamic-programming sweep.
+
+    Decision backpointers are bit-packed (one bit per item and capacity),
+    so the selection for any capacity is recovered in O(n). With
+    checkpoint_every, the DP row is saved every that many items so new
+    item values only re-run the sweep from the nearest checkpoint.
+    """
+
+    def __init__(self, values, weights, max_capacity, checkpoint_every=None):
+        self.weights = np.asarray(weights, dtype=np.int64)
+        self.max_capacity = int(max_capacity)
+        self.values = np.array(values, dtype=float)
+        self.checkpoint_every = checkpoint_every
+        self._checkpoints = {}
+
+        cap = self.max_capacity
+        self.value = np.zeros(cap + 1)
+        self.spent = np.zeros(cap + 1, dtype=np.int64)
+        self.count = np.zeros(cap + 1, dtype=np.int64)
+        self.keep = np.zeros((len(self.values), (cap + 8) // 8), dtype=np.uint8)
+        self._sweep(0)
+
+    def _sweep(self, start):
+        cap = self.max_capacity
+        every = self.checkpoint_every
+        for i in range(start, len(self.values)):
+            if every and i % every == 0:
+                self._checkpoints[i] = (self.value.copy(), self.spent.copy(), self.count.copy())
+            wi = self.weights[i]
+            if wi > cap:
+                self.keep[i] = 0
+                continue
+            candidate = self.value[:cap + 1 - wi] + self.values[i]
+            better = candidate > self.value[wi:]
+            self.value[wi:] = np.where(better, candidate, self.value[wi:])
+            self.spent[wi:] = np.where(better, self.spent[:cap + 1 - wi] + wi, self.spent[wi:])
+            self.count[wi:] = np.where(better, self.count[:cap + 1 - wi] + 1, self.count[wi:])
+            row = np.zeros(cap + 1, dtype=bool)
+            row[wi:] = better
+            self.keep[i] = np.packbits(row)
+
+    def update_values(self, values):
+        """
+        Re-run the sweep for new item values, starting from the checkpoint
+        before the first changed item (requires checkpoint_every).
+        Returns the item index the sweep restarted from.
+        """
+        values = np.asarray(values, dtype=float)
+        changed = np.flatnonzero(values != self.values)
+        if not len(changed):
+            return len(values)
+        self.values = values.copy()
+        if not self.checkpoint_every:
+            self.value[:], self.spent[:], self.count[:] = 0, 0, 0
+            self._sweep(0)
+            return 0
+        start = changed[0] // self.checkpoint_every * self.checkpoint_every
+        self.value, self.spent, self.count = (a.copy() for a in self._checkpoints[start])
+        self._sweep(start)
+        return start
+
+    def select(self, capacity):
+        """
+        Boolean selection of the optimal portfolio at the given capacity.
+        """
+        c = min(int(capacity), self.max_capacity)
+        chosen = np.zeros(len(self.weights), dtype=bool)
+        for i in range(len(self.weights) - 1, -1, -1):
+            if c < 0:
+                break
+            if self.keep[i, c >> 3] >> (7 - (c & 7)) & 1:
+                chosen[i] = True
+                c -= self.weights[i]
+        return chosen
+
+
+def _knapsack_bnb(v, w, cap, deadline, gap_tolerance=0.0):
+    """
+    Depth-first branch-and-bound on ratio-sorted items.
+    Nodes that cannot improve the best value found by more than
+    gap_tolerance of the LP bound are pruned.
+    Returns the best selection found and an upper bound on the optimum.
+    """
+    V = np.concatenate(([0.0], np.cumsum(v)))
+    W = np.concatenate(([0], np.cumsum(w)))
+    m = len(v)
+
+    root = _fill(V, W, 0, cap)[1]
+    slack = gap_tolerance * abs(root)
+    best_value, best_path, best_tail = 0.0, None, (0, 0)
+    stack = [(0, cap, 0.0, None, root)]
+    pruned = 0.0
+    nodes = 0
+
+    while stack:
+        nodes += 1
+        if deadline is not None and nodes % 1024 == 0 and time.perf_counter() > deadline:
+            break
+
+        k, c, value, path, bound = stack.pop()
+        if bound <= best_value + slack:
+            pruned = max(pruned, bound)
+            continue
+
+        j, bound = _fill(V, W, k, c)
+        if value + V[j] - V[k] > best_value:
+            best_value, best_path, best_tail = value + V[j] - V[k], path, (k, j)
+        if j == m or value + bound <= best_value + slack:
+            pruned = max(pruned, value + bound if j < m else 0.0)
+            continue
+
+        # branch on item k, exploring the LP-consistent "take" branch first
+        _, bound_out = _fill(V, W, k + 1, c)
+        stack.append((k + 1, c, value, path, value + bound_out))
+        if w[k] <= c:
+            _, bound_take = _fill(V, W, k + 1, c - w[k])
+            stack.append((
+                k + 1, c - w[k], value + v[k], (k, k + 1, path),
+                value + v[k] + bound_take
+            ))
+
+    upper = max([best_value, pruned] + [node[4] for node in stack])
+
+    chosen = np.zeros(m, dtype=bool)
+    chosen[best_tail[0]:best_tail[1]] = True
+    while best_path is not None:
+        start, stop, best_path = best_path
+        chosen[start:stop] = True
+    return chosen, upper
+
+
+def _ratio_order(values, weights):
+    """Positive-value, positive-weight items by decreasing value per unit of capital"""
+    order = np.flatnonzero((values > 0) & (weights > 0))
+    return order[np.argsort(-values[order] / weights[order], kind="stable")]
+
+
+@traced("allocation_model.solve_knapsack")
+def solve_knapsack(values, weights, capacity, time_limit=None, max_cells=50_000_000,
+                   window=64, order=None, start=None, gap_tolerance=0.0):
+    """
+    Exact 0/1 knapsack: maximise total value with total weight <= capacity.
+
+    Weights and capacity are integer capital units. A greedy solution,
+    improved by an exact DP over the `window` items either side of the
+    LP-critical item, gives the incumbent. Items whose LP bound cannot
+    beat it are fixed first; the remaining core is
+    solved by dynamic programming when it fits in max_cells, otherwise by
+    branch-and-bound with LP-relaxation bounds, which stops once the
+    solution is within gap_tolerance of the bound (0: proven optimum).
+
+    A precomputed ratio order (see _ratio_order) and a feasible starting
+    selection, e.g. a previous solution, can be passed to warm-start.
+
+    Returns the boolean selection and a dict with the method used, the
+    objective value, the upper bound and the relative optimality gap.
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=np.int64)
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+    selected = (values > 0) & (weights <= 0)
+    if order is None:
+        order = _ratio_order(values, weights)
+    order = order[weights[order] <= capacity]
+    v, w = values[order], weights[order]
+    V = np.concatenate(([0.0], np.cumsum(v)))
+    W = np.concatenate(([0], np.cumsum(w)))
+    m = len(order)
+
+    # LP relaxation and greedy incumbent
+    s, lp_bound = _fill(V, W, 0, capacity)
+    greedy = np.zeros(m, dtype=bool)
+    greedy[:s] = True
+    room = capacity - W[s]
+    for i in range(s, m):
+        if w[i] <= room:
+            greedy[i] = True
+            room -= w[i]
+    incumbent = v[greedy].sum()
+    if start is not None and v[start[order]].sum() > incumbent:
+        greedy = start[order]
+        incumbent = v[greedy].sum()
+
+    # on instances too large for a plain DP, sharpen the incumbent with an
+    # exact DP on a window around the critical item
+    lo, hi = max(s - window, 0), min(s + window, m)
+    if (m * (capacity + 1) > max_cells and lp_bound - incumbent > 1e-9
+            and hi > lo and (hi - lo) * (capacity - W[lo] + 1) <= max_cells):
+        around = np.zeros(m, dtype=bool)
+        around[:lo] = True
+        around[lo:hi] = KnapsackFrontier(v[lo:hi], w[lo:hi], capacity - W[lo]).select(capacity - W[lo])
+        if v[around].sum() > incumbent:
+            greedy, incumbent = around, v[around].sum()
+
+    # fix items whose opposite assignment cannot beat the incumbent
+    lp_in = np.arange(m) < s
+    ratio = np.append(v / w, 0.0)
+    j = np.searchsorted(W, capacity + w, side="right") - 1
+    bound_out = V[j] - v + (capacity + w - W[j]) * ratio[j]
+    cap_in = capacity - w
+    j = np.clip(np.searchsorted(W, cap_in, side="right") - 1, 0, m)
+    bound_in = np.where(cap_in >= 0, v + V[j] + (cap_in - W[j]) * ratio[j], -np.inf)
+    tol = 1e-9 * max(1.0, abs(incumbent))
+    fixed_in = lp_in & (bound_out <= incumbent + tol)
+    fixed_out = ~lp_in & (bound_in <= incumbent + tol)
+    core = np.flatnonzero(~(fixed_in | fixed_out))
+
+    cap_core = capacity - w[fixed_in].sum()
+    chosen = fixed_in.copy()
+    if len(core) * (cap_core + 1) <= max_cells:
+        method = "dp"
+        chosen[core] = KnapsackFrontier(v[core], w[core], cap_core).select(cap_core)
+        upper = None
+    else:
+        method = "branch-and-bound"
+        chosen[core], upper = _knapsack_bnb(v[core], w[core], cap_core, deadline, gap_tolerance)
+        upper += v[fixed_in].sum()
+
+    if v[chosen].sum() < incumbent:
+        chosen = greedy
+    value = v[chosen].sum()
+    upper = value if upper is None else min(max(upper, value), lp_bound)
+
+    selected[order[chosen]] = True
+    value += values[(values > 0) & (weights <= 0)].sum()
+    upper += values[(values > 0) & (weights <= 0)].sum()
+
+    return selected, {
+        "method": method,
+        "value": value,
+        "bound": upper,
+        "gap": (upper - value) / abs(upper) if upper else 0.0,
+        "optimal": bool(upper - value <= tol),
+    }
+
+
+def _risk_constrained(values, weights, capacity, risk, risk_budget, time_limit, iterations=20,
+                      gap_tolerance=0.0):
+    """
+    Knapsack with a cap on portfolio volatility, by Lagrangian relaxation.
+
+    Each project's objective is charged lam times its marginal volatility
+    at the latest portfolio and the knapsack is re-solved; lam is bisected
+    towards the smallest charge whose portfolio meets the cap. Candidates
+    still over the cap are trimmed, most risk per unit of objective first,
+    then topped up with the projects that add the most objective per unit
+    of marginal volatility while both limits hold; the best is kept. The unconstrained optimum bounds the
+    value, so the gap is measured against it.
+    """
+    step_limit = None if time_limit is None else time_limit / (iterations + 1)
+    selected, info = solve_knapsack(
+        values, weights, capacity, time_limit=step_limit, gap_tolerance=gap_tolerance
+    )
+    volatility = risk.volatility(selected)
+    if volatility <= risk_budget:
+        return selected, dict(info, risk_lambda=0.0)
+
+    def repaired(candidate):
+        priority = risk.contributions(candidate) / np.maximum(values, 1e-12)
+        trimmed = risk.trim(candidate, risk_budget, priority)
+        marginal = np.maximum(risk.marginal(trimmed), 1e-12)
+        order = np.flatnonzero((values > 0) & ~trimmed)
+        order = order[np.argsort(-values[order] / marginal[order], kind="stable")]
+        return risk.fill(trimmed, order, risk_budget, weights, capacity)
+
+    best, best_lam = repaired(selected), None
+    lo, hi = 0.0, None
+    lam = max(values[selected].sum(), 1e-12) / volatility
+    current = selected
+    for _ in range(iterations):
+        candidate, _ = solve_knapsack(
+            values - lam * risk.marginal(current), weights, capacity, time_limit=step_limit,
+            gap_tolerance=gap_tolerance
+        )
+        if risk.volatility(candidate) <= risk_budget:
+            hi = lam
+        else:
+            lo = lam
+        fixed = repaired(candidate)
+        if values[fixed].sum() > values[best].sum():
+            best, best_lam = fixed, lam
+        current = candidate
+        lam = 2 * lam if hi is None else (lo + hi) / 2
+
+    value = values[best].sum()
+    bound = info["bound"]
+    return best, {
+        "method": info["method"] + " + risk budget",
+        "value": value,
+        "bound": bound,
+        "gap": (bound - value) / abs(bound) if bound else 0.0,
+        "optimal": bool(bound - value <= 1e-9 * max(1.0, abs(bound))),
+        "risk_lambda": best_lam,
+    }
+
+
+def _select(values, investment, budget, unit, time_limit, risk=None, risk_budget=None,
+            gap_tolerance=GAP_TOLERANCE):
+    """Solver half of allocate(): the funded selection and the solver details"""
+    weights = np.ceil(investment / unit - 1e-9).astype(np.int64)
+    capacity = int(np.floor(budget / unit + 1e-9))
+
+    if risk_budget is not None:
+        if risk is None:
+            raise ValueError("risk_budget needs a PortfolioRisk for the projects")
+        selected, info = _risk_constrained(
+            values, weights, capacity, risk, risk_budget, time_limit, gap_tolerance=gap_tolerance
+        )
+    else:
+        selected, info = solve_knapsack(
+            values, weights, capacity, time_limit=time_limit, gap_tolerance=gap_tolerance
+        )
+    if risk is not None:
+        info["risk"] = risk.volatility(selected)
+    return selected, info
+
+
+@traced("allocation_model.allocate")
+def allocate(df, budget=100, objective="Score", unit=1, time_limit=10, risk=None,
+             risk_budget=None, gap_tolerance=GAP_TOLERANCE):
     """
-    spent = 0
-    selected = []
+    Capital allocation under a fixed budget constraint.
 
-    for _, row in df.sort_values("Score", ascending=False).iterrows():
-        if spent + row["Investment"] <= budget:
-            spent += row["Investment"]
-            selected.append(row["Project_ID"])
+    Funds the subset of projects that maximises the total objective
+    (Score or NPV) within the budget. Investments are rounded up to
+    multiples of `unit` ₹ Cr for the solver, which stops once within
+    gap_tolerance of the best achievable value or at time_limit seconds;
+    solver details, including that gap, are kept in df.attrs["allocation"].
 
-    df["Decision"] = df["Project_ID"].apply(
-        lambda x: "Selected (Funded)" if x in selected else "Rejected (Budget Constraint)"
+    With a PortfolioRisk for the same rows, the portfolio volatility
+    (₹ Cr) is added to the solver details, and risk_budget caps it.
+    """
+    count("rows.allocated", len(df))
+    values = df[objective].to_numpy(dtype=float)
+    selected, info = _select(
+        values, df["Investment"].to_numpy(dtype=float),
+        budget, unit, time_limit, risk, risk_budget, gap_tolerance
     )
 
+    df["Decision"] = _decisions(selected, values)
+    df.attrs["allocation"] = info
+    spent = df.loc[selected, "Investment"].sum()
+
     return df, spent
+
+
+@traced("allocation_model.efficient_frontier")
+def efficient_frontier(df, max_budget, objective="Score", unit=1):
+    """
+    Optimal portfolio value for every budget from 0 to max_budget.
+
+    Returns a DataFrame of Budget, Value, Spent and Projects per budget
+    step, and the KnapsackFrontier for looking up any budget's selection.
+    """
+    weights = np.ceil(df["Investment"].to_numpy(dtype=float) / unit - 1e-9).astype(np.int64)
+    capacity = int(np.floor(max_budget / unit + 1e-9))
+
+    frontier = KnapsackFrontier(df[objective].to_numpy(dtype=float), weights, capacity)
+
+    curve = pd.DataFrame({
+        "Budget": np.arange(capacity + 1) * unit,
+        "Value": frontier.value,
+        "Spent": frontier.spent * unit,
+        "Projects": frontier.count
+    })
+
+    return curve, frontier
+
+
+def spend_schedule(investment, life, years, start=None):
+    """
+    Capital outlay per project and fiscal year, shape (projects, years).
+
+    Each investment is spread evenly over its project's life, beginning
+    in its start year (default 0); outlays after the last budgeted year
+    fall outside the budget vector.
+    """
+    investment = np.asarray(investment, dtype=float)
+    life = np.maximum(np.asarray(life, dtype=np.int64), 1)
+    start = np.zeros(len(life), dtype=np.int64) if start is None else np.asarray(start, dtype=np.int64)
+    year = np.arange(years)
+    active = (year >= start[:, None]) & (year < (start + life)[:, None])
+    return active * (investment / life)[:, None]
+
+
+def _fill_greedy(chosen, order, a, slack, tol):
+    """
+    Adds items in order while every year's slack holds. Each round takes
+    the longest prefix that fits, drops the item that broke it (slack only
+    shrinks, so it never fits later) and any item no longer fitting alone.
+    """
+    while len(order):
+        used = np.cumsum(a[order], axis=0)
+        fits = (used <= slack + tol).all(axis=1)
+        k = len(order) if fits.all() else int(np.argmin(fits))
+        chosen[order[:k]] = True
+        if k:
+            slack = slack - used[k - 1]
+        order = order[k + 1:]
+        order = order[(a[order] <= slack + tol).all(axis=1)]
+    return chosen
+
+
+def _repair(x, v, a, cap, weight, tol):
+    """
+    Feasible selection from a relaxed one: while a year is over budget,
+    drops the projects with the least value per unit of over-budget
+    spend, then refills greedily by value per unit of weighted spend.
+    """
+    chosen = x.copy()
+    usage = a[chosen].sum(axis=0)
+    over = usage > cap + tol
+    if over.any():
+        rows = np.flatnonzero(chosen)
+        drop = rows[np.argsort(v[rows] / np.maximum(a[rows][:, over].sum(axis=1), 1e-12), kind="stable")]
+        left = usage - np.cumsum(a[drop], axis=0)
+        k = int(np.argmax((left <= cap + tol).all(axis=1))) + 1
+        chosen[drop[:k]] = False
+        usage = left[k - 1]
+
+    rows = np.flatnonzero(~chosen)
+    price = np.maximum(a[rows] @ weight, 1e-12)
+    order = rows[np.argsort(-v[rows] / price, kind="stable")]
+    return _fill_greedy(chosen, order, a, cap - usage, tol)
+
+
+def _enumerate(v, a, cap, tol):
+    """Best feasible subset of a few items by checking all of them"""
+    masks = np.arange(1 << len(v), dtype=np.int64)
+    chosen = (masks[:, None] >> np.arange(len(v))) & 1 == 1
+    totals = np.where((chosen @ a <= cap + tol).all(axis=1), chosen @ v, -np.inf)
+    return chosen[int(np.argmax(totals))]
+
+
+def _swap_improve(chosen, v, a, cap, weight, tol, width=256, rounds=50):
+    """
+    Local search on a feasible selection: repeatedly makes the best
+    value-increasing swap between the width least valuable funded and the
+    width most valuable unfunded projects, refilling greedily after each.
+    """
+    for _ in range(rounds):
+        slack = cap - a[chosen].sum(axis=0)
+        funded = np.flatnonzero(chosen)
+        unfunded = np.flatnonzero(~chosen)
+        if not len(funded) or not len(unfunded):
+            break
+        if len(funded) > width:
+            funded = funded[np.argpartition(v[funded], width - 1)[:width]]
+        if len(unfunded) > width:
+            unfunded = unfunded[np.argpartition(-v[unfunded], width - 1)[:width]]
+        gain = v[unfunded][None, :] - v[funded][:, None]
+        fits = (a[unfunded][None, :, :] - a[funded][:, None, :] <= slack + tol).all(axis=2)
+        gain = np.where(fits, gain, 0.0)
+        i, j = np.unravel_index(np.argmax(gain), gain.shape)
+        if gain[i, j] <= tol * max(1.0, abs(v[chosen].sum())):
+            break
+        chosen = chosen.copy()
+        chosen[funded[i]], chosen[unfunded[j]] = False, True
+        rows = np.flatnonzero(~chosen)
+        order = rows[np.argsort(-v[rows] / np.maximum(a[rows] @ weight, 1e-12), kind="stable")]
+        chosen = _fill_greedy(chosen, order, a, cap - a[chosen].sum(axis=0), tol)
+    return chosen
+
+
+@traced("allocation_model.solve_multi_period")
+def solve_multi_period(values, spend, budgets, time_limit=None, iterations=500,
+                       gap_tolerance=1e-6, core_limit=16):
+    """
+    0/1 capital rationing with a budget per fiscal year: maximise total
+    value with each year's spend (spend[:, t]) within budgets[t].
+
+    Lagrangian relaxation: charging a multiplier per year on spend makes
+    the problem separable (fund every project whose value beats its
+    charged spend), and its value is an upper bound on the optimum for any
+    non-negative multipliers. Subgradient steps (Polyak step length,
+    halved when the bound stalls) tighten the bound; relaxed selections
+    are repaired into feasible ones and the best is kept. Stops once the
+    gap is within gap_tolerance, the steps have shrunk away or time_limit
+    runs out. Projects whose reduced value rules out a better selection
+    with them flipped are then fixed; up to core_limit others are
+    enumerated exactly, else the best selection is improved by swaps.
+
+    Returns the boolean selection and a dict with the method, value,
+    bound, relative gap, the multipliers (value per ₹ Cr in each year)
+    and the spend per year.
+    """
+    values = np.asarray(values, dtype=float)
+    budgets = np.asarray(budgets, dtype=float).reshape(-1)
+    spend = np.asarray(spend, dtype=float).reshape(len(values), len(budgets))
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    tol = 1e-9
+
+    # projects worth nothing, or over a year's budget on their own, stay out
+    fundable = (values > 0) & (spend <= budgets + tol).all(axis=1)
+    free = fundable & (spend <= 0).all(axis=1)
+    items = np.flatnonzero(fundable & ~free)
+
+    # each year in units of its budget, so multipliers are comparable
+    scale = np.where(budgets > 0, budgets, 1.0)
+    v, a = values[items], spend[items] / scale
+    cap = budgets / scale
+
+    lam = np.zeros(len(budgets))
+    best = _repair(np.zeros(len(items), dtype=bool), v, a, cap, np.ones(len(budgets)), tol)
+    bound, best_lam = v.sum(), lam
+    step, stall, it = 2.0, 0, 0
+    for it in range(1, iterations + 1):
+        reduced = v - a @ lam
+        x = reduced > 0
+        dual = lam @ cap + reduced[x].sum()
+        improved = dual < bound - tol * max(1.0, abs(bound))
+        if improved:
+            bound, best_lam, stall = dual, lam, 0
+        else:
+            stall += 1
+            if stall == 20:
+                step, stall = step / 2, 0
+
+        # repair (a sort of the catalog) when the bound moves, else every 10th step
+        if improved or it % 10 == 0:
+            candidate = _repair(x, v, a, cap, lam + 1e-6, tol)
+            if v[candidate].sum() > v[best].sum():
+                best = candidate
+        value = v[best].sum()
+        if bound - value <= gap_tolerance * max(1.0, abs(bound)) or step < 1e-4:
+            break
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+
+        g = cap - x @ a
+        g[(lam <= 0) & (g > 0)] = 0.0
+        norm = g @ g
+        if norm == 0:
+            break
+        lam = np.maximum(lam - step * (dual - value) / norm * g, 0.0)
+
+    # reduced-cost fixing: funding a project against its relaxed choice at
+    # best_lam costs at least |reduced| of the bound, so only projects with
+    # |reduced| below the gap can differ in a better selection; when those
+    # are few, enumerating them proves the best selection optimal
+    value = v[best].sum()
+    if bound - value > gap_tolerance * max(1.0, abs(bound)):
+        reduced = v - a @ best_lam
+        core = np.flatnonzero(np.abs(reduced) < bound - value)
+        fixed = (reduced > 0) & (np.abs(reduced) >= bound - value)
+        rest = cap - a[fixed].sum(axis=0)
+        if len(core) <= core_limit and (rest >= -tol).all():
+            pick = _enumerate(v[core], a[core], rest, tol)
+            if v[fixed].sum() + v[core][pick].sum() > value:
+                best = fixed.copy()
+                best[core[pick]] = True
+            bound = v[best].sum()
+        else:
+            best = _swap_improve(best, v, a, cap, best_lam + 1e-6, tol)
+
+    selected = free.copy()
+    selected[items[best]] = True
+    value = values[selected].sum()
+    bound = max(bound + values[free].sum(), value)
+    count("multi_period.iterations", it)
+    return selected, {
+        "method": "lagrangian",
+        "value": value,
+        "bound": bound,
+        "gap": (bound - value) / abs(bound) if bound else 0.0,
+        "optimal": bool(bound - value <= tol * max(1.0, abs(bound))),
+        "iterations": it,
+        "multipliers": (best_lam / scale).tolist(),
+        "spend": spend[selected].sum(axis=0).tolist(),
+    }
+
+
+@traced("allocation_model.allocate_multi_period")
+def allocate_multi_period(df, budgets, life=None, spend=None, start=None, objective="Score",
+                          time_limit=10, iterations=500):
+    """
+    Capital allocation under a budget per fiscal year.
+
+    budgets lists the capital available in each year. Each project's
+    outlay per year is spend (projects x years) or, given project lives
+    (and optionally start years), spend_schedule() of its Investment.
+    Solver details, including the upper bound and gap, are kept in
+    df.attrs["allocation"]; returns df and the capital spent per year.
+    """
+    if spend is None:
+        if life is None:
+            raise ValueError("allocate_multi_period needs project lives or a spend schedule")
+        spend = spend_schedule(df["Investment"].to_numpy(dtype=float), life, len(budgets), start)
+
+    count("rows.allocated", len(df))
+    values = df[objective].to_numpy(dtype=float)
+    selected, info = solve_multi_period(values, spend, budgets, time_limit, iterations)
+
+    df["Decision"] = _decisions(selected, values)
+    df.attrs["allocation"] = info
+
+    return df, np.array(info["spend"])
+
+
+class AllocationSession:
+    """
+    Keeps an allocation warm across budget and score what-ifs.
+
+    When every budget up to max_budget fits in one DP table (max_cells),
+    the session holds a checkpointed KnapsackFrontier: a budget move is an
+    O(n) lookup and a score edit re-runs the DP only from the checkpoint
+    before the first edited project. Larger catalogs keep the ratio-sorted
+    order, patched in place for edited projects, and re-optimise only a
+    window around the LP-critical item plus the edited projects; the full
+    solver, seeded with that answer, runs only if the window result is
+    further from the LP bound than both the last full solve and
+    gap_tolerance.
+
+    Each change records the projects whose Decision flipped in `flipped`.
+    """
+
+    def __init__(self, df, budget=100, objective="Score", unit=1, time_limit=10,
+                 max_budget=None, max_cells=50_000_000, checkpoint_every=64, window=64, gap_tolerance=1e-5):
+        self.df = df.copy()
+        self.objective = objective
+        self.unit = unit
+        self.time_limit = time_limit
+        self.max_cells = max_cells
+        self.checkpoint_every = checkpoint_every
+        self.window = window
+        self.gap_tolerance = gap_tolerance
+
+        self.weights = np.ceil(df["Investment"].to_numpy(dtype=float) / unit - 1e-9).astype(np.int64)
+        self.values = df[objective].to_numpy(dtype=float).copy()
+        self.capacity = int(np.floor(budget / unit + 1e-9))
+        self.frontier = None
+        self._order = None
+        self._full_gap = None
+        self._edited = np.zeros(0, dtype=np.int64)
+        self._build_frontier(max_budget if max_budget is not None else 2 * budget)
+
+        self.selected = np.zeros(len(self.values), dtype=bool)
+        self._solve()
+        self.flipped = self._flips(self.selected)
+
+    def _build_frontier(self, max_budget):
+        max_capacity = max(int(np.floor(max_budget / self.unit + 1e-9)), self.capacity)
+        if len(self.values) * (max_capacity + 1) <= self.max_cells:
+            self.frontier = KnapsackFrontier(
+                self.values, self.weights, max_capacity, self.checkpoint_every
+            )
+        else:
+            self.frontier = None
+
+    @property
+    def order(self):
+        if self._order is None:
+            self._order = _ratio_order(self.values, self.weights)
+        return self._order
+
+    def _reorder(self, changed):
+        """Move edited projects to their new place in the ratio order without a full sort"""
+        if self._order is None:
+            return
+        if len(changed) > len(self.values) // 8:
+            self._order = None
+            return
+        order = self._order[~np.isin(self._order, changed)]
+        add = changed[(self.values[changed] > 0) & (self.weights[changed] > 0)]
+        key = -self.values[order] / self.weights[order]
+        add_key = -self.values[add] / self.weights[add]
+        add, add_key = add[np.argsort(add_key, kind="stable")], np.sort(add_key, kind="stable")
+        self._order = np.insert(order, np.searchsorted(key, add_key, side="right"), add)
+
+    def _trimmed(self):
+        """The previous selection cut back, lowest ratio first, to fit the budget"""
+        ranked = self.order[self.selected[self.order]]
+        ranked = ranked[np.cumsum(self.weights[ranked]) <= self.capacity]
+        start = np.zeros(len(self.values), dtype=bool)
+        start[ranked] = True
+        return start
+
+    def _local(self):
+        """
+        Re-optimise only the region of the ratio order a small change can
+        affect: the `window` items either side of the new LP-critical item
+        plus any edited projects. Everything else keeps its previous
+        decision. Returns None when the region DP would be too large.
+        """
+        order = self.order[self.weights[self.order] <= self.capacity]
+        v, w = self.values[order], self.weights[order]
+        V = np.concatenate(([0.0], np.cumsum(v)))
+        W = np.concatenate(([0], np.cumsum(w)))
+        s, bound = _fill(V, W, 0, self.capacity)
+
+        region = np.zeros(len(order), dtype=bool)
+        region[max(s - self.window, 0):s + self.window] = True
+        region |= np.isin(order, self._edited)
+        keep = self._trimmed()[order] & ~region
+        residual = self.capacity - w[keep].sum()
+        idx = np.flatnonzero(region)
+        if len(idx) * (residual + 1) > self.max_cells:
+            return None
+
+        chosen = keep.copy()
+        chosen[idx[KnapsackFrontier(v[idx], w[idx], residual).select(residual)]] = True
+        free = (self.values > 0) & (self.weights <= 0)
+        selected = free.copy()
+        selected[order[chosen]] = True
+        value = v[chosen].sum() + self.values[free].sum()
+        bound += self.values[free].sum()
+        tol = 1e-9 * max(1.0, abs(value))
+        return selected, {
+            "method": "warm-window",
+            "value": value,
+            "bound": bound,
+            "gap": (bound - value) / abs(bound) if bound else 0.0,
+            "optimal": bool(bound - value <= tol),
+        }
+
+    def _solve(self):
+        if self.frontier is not None and self.capacity <= self.frontier.max_capacity:
+            self.selected = self.frontier.select(self.capacity)
+            value = self.values[self.selected].sum()
+            self.info = {"method": "frontier", "value": value, "bound": value,
+                         "gap": 0.0, "optimal": True}
+        else:
+            # keep the local answer if it is as tight as the last full solve
+            # or within gap_tolerance of the LP bound
+            local = None if self._full_gap is None else self._local()
+            if local is not None and local[1]["gap"] <= max(self._full_gap, self.gap_tolerance):
+                self.selected, self.info = local
+            else:
+                start = self._trimmed() if local is None else local[0]
+                self.selected, self.info = solve_knapsack(
+                    self.values, self.weights, self.capacity, time_limit=self.time_limit,
+                    max_cells=self.max_cells, order=self.order, start=start
+                )
+                self._full_gap = self.info["gap"]
+        self._edited = np.zeros(0, dtype=np.int64)
+
+    def _flips(self, before):
+        changed = np.flatnonzero(before != self.selected)
+        count("allocation.flips", len(changed))
+        return pd.DataFrame({
+            "Project_ID": self.df["Project_ID"].to_numpy()[changed],
+            "Decision": _decisions(self.selected[changed], self.values[changed])
+        })
+
+    def _set_values(self, values):
+        values = np.asarray(values, dtype=float)
+        changed = np.flatnonzero(values != self.values)
+        self.values = values.copy()
+        self.df[self.objective] = self.values
+        self._edited = np.union1d(self._edited, changed)
+        if self.frontier is not None:
+            self.frontier.update_values(self.values)
+        self._reorder(changed)
+
+    def _set_budget(self, budget):
+        self.capacity = int(np.floor(budget / self.unit + 1e-9))
+        if self.frontier is not None and self.capacity > self.frontier.max_capacity:
+            self._build_frontier(2 * budget)
+
+    @traced("allocation_model.AllocationSession.set_budget")
+    def set_budget(self, budget):
+        """Re-allocate under a new budget; returns the flipped projects"""
+        before = self.selected
+        self._set_budget(budget)
+        self._solve()
+        self.flipped = self._flips(before)
+        return self.flipped
+
+    @traced("allocation_model.AllocationSession.set_values")
+    def set_values(self, values):
+        """Re-allocate with new objective values, aligned to the session rows"""
+        before = self.selected
+        self._set_values(values)
+        self._solve()
+        self.flipped = self._flips(before)
+        return self.flipped
+
+    @traced("allocation_model.AllocationSession.update")
+    def update(self, df, budget=None):
+        """
+        Re-allocate for a rescored copy of the same catalog (same projects
+        and investments, in the same order), optionally with a new budget.
+        """
+        same = (
+            len(df) == len(self.df)
+            and np.array_equal(df["Project_ID"].to_numpy(), self.df["Project_ID"].to_numpy())
+            and np.array_equal(df["Investment"].to_numpy(), self.df["Investment"].to_numpy())
+        )
+        if not same:
+            raise ValueError("Catalog changed beyond its objective values; start a new session")
+
+        before = self.selected
+        self.df = df.copy()
+        self._set_values(df[self.objective].to_numpy(dtype=float))
+        if budget is not None:
+            self._set_budget(budget)
+        self._solve()
+        self.flipped = self._flips(before)
+        return self.flipped
+
+    def result(self):
+        """(df, spent) in the same form allocate returns"""
+        df = self.df.copy()
+        df["Decision"] = _decisions(self.selected, self.values)
+        df.attrs["allocation"] = self.info
+        return df, df.loc[self.selected, "Investment"].sum()
+
+
+class ProjectStore:
+    """
+    Columnar project table for large catalogs.
+
+    Columns are NumPy arrays. Those passed in are kept without copying
+    (from_evaluation() reads straight from an evaluation and its NPV
+    grid); those the store derives are compact: normalised metrics in
+    float32, Industry as categorical codes and the funding decision as a
+    bitmask, one bit per project (frame() labels unfunded projects from
+    the objective they were allocated on). Scores stay float64 because the solver
+    ranks on them. frame() wraps the columns in a DataFrame without copying
+    them, in the layout score_projects() and allocate() produce.
+    """
+
+    def __init__(self, project_id, investment, npv, irr, payback, risk, industry=None):
+        self.columns = {
+            "Project_ID": np.asarray(project_id),
+            "Investment": np.asarray(investment),
+            "NPV": np.asarray(npv, dtype=float),
+            "IRR": np.asarray(irr, dtype=float),
+            "Payback": np.asarray(payback, dtype=float),
+            "Risk": np.asarray(risk, dtype=float),
+        }
+        if industry is not None:
+            industry = pd.Categorical(industry)
+            self.industries = industry.categories
+            self.industry = industry.codes
+        else:
+            self.industries = self.industry = None
+        self.normalised = None
+        self.scores = None
+        self.decision = None
+        self.objective = None
+        self.info = None
+
+    @classmethod
+    def from_evaluation(cls, evaluation, wacc):
+        """Metrics at one WACC, as views of an evaluate_scenario()-style dict"""
+        from evaluation import npv_at
+
+        return cls(
+            evaluation["Project_ID"], evaluation["Investment"], npv_at(evaluation, wacc),
+            evaluation["IRR"], evaluation["Payback"], evaluation["Risk"],
+            evaluation.get("Industry")
+        )
+
+    @classmethod
+    def from_frame(cls, df):
+        """From a metrics_at() style table"""
+        return cls(
+            df["Project_ID"].to_numpy(), df["Investment"].to_numpy(), df["NPV"].to_numpy(),
+            df["IRR"].to_numpy(), df["Payback"].to_numpy(), df["Risk"].to_numpy(),
+            df["Industry"] if "Industry" in df else None
+        )
+
+    def __len__(self):
+        return len(self.columns["Project_ID"])
+
+    @property
+    def nbytes(self):
+        """Bytes held by the store's own arrays (views count in full)"""
+        arrays = [*self.columns.values(), self.industry, self.normalised, self.scores, self.decision]
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    @traced("allocation_model.ProjectStore.score")
+    def score(self, block=65536):
+        """
+        Same scores as score_projects(), computed in blocks of rows so the
+        float64 temporaries stay bounded; returns the store.
+        """
+        count("rows.scored", len(self))
+        if not len(self):
+            raise ValueError("Cannot score an empty project list")
+
+        metrics = {m: self.columns[m] for m in SCORE_METRICS}
+        slowest = _slowest(metrics["Payback"])
+        bounds = {m: (np.nanmin(metrics[m]), np.nanmax(metrics[m])) for m in ["NPV", "IRR", "Risk"]}
+        filled = _fill_payback(metrics["Payback"], slowest)
+        bounds["Payback"] = (np.nanmin(filled), np.nanmax(filled))
+        del filled
+
+        normalised = np.empty((len(SCORE_METRICS), len(self)), dtype=np.float32)
+        score = np.empty(len(self))
+        for start in range(0, len(self), block):
+            rows = slice(start, start + block)
+            out = _score_rows({m: v[rows] for m, v in metrics.items()}, bounds, slowest)
+            for i, m in enumerate(SCORE_METRICS):
+                normalised[i, rows] = out[f"{m}_n"]
+            score[rows] = out["Score"]
+        self.normalised, self.scores = normalised, score
+        self.decision = self.info = None
+        return self
+
+    @traced("allocation_model.ProjectStore.allocate")
+    def allocate(self, budget=100, objective="Score", unit=1, time_limit=10, risk=None,
+                 risk_budget=None, gap_tolerance=GAP_TOLERANCE):
+        """allocate() on the store; keeps the decision as a bitmask and returns the capital spent"""
+        count("rows.allocated", len(self))
+        if objective == "Score" and self.scores is None:
+            self.score()
+        values = self.scores if objective == "Score" else self.columns[objective]
+        investment = np.asarray(self.columns["Investment"], dtype=float)
+        selected, self.info = _select(
+            values, investment, budget, unit, time_limit, risk, risk_budget, gap_tolerance
+        )
+        self.decision = np.packbits(selected)
+        self.objective = objective
+        return self.columns["Investment"][selected].sum()
+
+    @property
+    def selected(self):
+        """Funded projects as a boolean array"""
+        return np.unpackbits(self.decision, count=len(self)).astype(bool)
+
+    def frame(self):
+        """
+        DataFrame view of the store: source and derived columns are not
+        copied; Industry and Decision become categoricals on their codes.
+        """
+        columns = dict(self.columns)
+        columns["Project_ID"] = pd.Series(columns["Project_ID"], dtype=columns["Project_ID"].dtype, copy=False)
+        if self.industry is not None:
+            columns["Industry"] = pd.Categorical.from_codes(self.industry, self.industries)
+        if self.normalised is not None:
+            for i, m in enumerate(SCORE_METRICS):
+                columns[f"{m}_n"] = self.normalised[i]
+            columns["Score"] = self.scores
+        if self.decision is not None:
+            values = self.scores if self.objective == "Score" else self.columns[self.objective]
+            columns["Decision"] = pd.Categorical.from_codes(
+                decision_codes(self.selected, values), DECISIONS
+            )
+        df = pd.DataFrame(columns, copy=False)
+        if self.info is not None:
+            df.attrs["allocation"] = self.info
+        return df
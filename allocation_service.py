@@ -0,0 +1,299 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from allocation_model import ProjectStore
+from cache import LRUCache
+from evaluation import WACC_GRID, evaluate_scenarios, scenario_slice
+from instrumentation import count, span
+from pipeline import forecast_inputs
+from scenario_analysis import SCENARIOS
+
+# Requested WACCs are rounded to the grid's precision, so near-identical
+# requests share a result
+WACC_DECIMALS = 4
+
+
+def request_key(scenario="Base", wacc=0.11, budget=100, objective="Score"):
+    """
+    Hashable key of a valid allocation request; scenario is a SCENARIOS
+    name or a (revenue, cost) factor pair and the WACC is rounded to
+    WACC_DECIMALS places. Raises ValueError otherwise.
+    """
+    if isinstance(scenario, str):
+        if scenario not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {scenario!r}; choose from {', '.join(SCENARIOS)}")
+    else:
+        try:
+            factors = [float(f) for f in scenario if not isinstance(f, (bool, str))]
+        except (TypeError, ValueError):
+            factors = []
+        if len(factors) != 2 or len(scenario) != 2 or not np.isfinite(factors).all():
+            raise ValueError(
+                f"A scenario shock is two finite (revenue, cost) factors, not {scenario!r}"
+            )
+        scenario = tuple(factors)
+    if objective not in ("Score", "NPV"):
+        raise ValueError(f"Unknown objective {objective!r}; choose Score or NPV")
+    wacc, budget = float(wacc), float(budget)
+    if not (np.isfinite(wacc) and np.isfinite(budget)):
+        raise ValueError("WACC and budget must be finite")
+    return scenario, round(wacc, WACC_DECIMALS), budget, objective
+
+
+def _scenario_name(scenario):
+    return scenario if isinstance(scenario, str) else "Shock {!r}/{!r}".format(*scenario)
+
+
+class AllocationService:
+    """
+    Shared allocation pipeline for concurrent callers on one catalog.
+
+    Requests arriving within `window` seconds of each other are coalesced
+    into one batch (at most max_batch distinct requests): forecasts are
+    fitted once per service, the batch's new scenarios are evaluated
+    together over the WACC grid in one call, and requests that share a
+    scenario and WACC are scored once and allocated per budget. The last
+    max_evaluations scenarios are kept; WACCs off the grid are priced from
+    their unit-margin cash flows. Identical requests in flight share one
+    result, as do repeats within result_ttl seconds (up to max_results
+    results are kept); every caller gets its own DataFrame.
+
+    Use `await service.allocate(...)` on an event loop, or start() the
+    service on its own loop thread and call submit() from any thread, as
+    Streamlit sessions would. Batches run one at a time on a worker
+    thread, each solve within time_limit seconds. stats() reports latency
+    percentiles and throughput.
+    """
+
+    def __init__(self, projects, historical, window=0.005, max_batch=256, max_results=256,
+                 result_ttl=300, max_evaluations=64, time_limit=10, history=100_000):
+        self.projects = projects
+        self.historical = historical
+        self.window = window
+        self.max_batch = max_batch
+        self.time_limit = time_limit
+        self.results = LRUCache(max_items=max_results, max_age=result_ttl, name="service.results")
+        self.max_evaluations = max_evaluations
+        self.evaluations = OrderedDict()
+        self.forecasts = None
+
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._queue = None
+        self._batcher = None
+        self._inflight = {}
+        self._loop = None
+        self._thread = None
+
+        self._latencies = deque(maxlen=history)
+        self._counts = dict.fromkeys(
+            ["requests", "completed", "failed", "deduplicated", "cached", "batches", "batched"], 0
+        )
+        self._first = None
+        self._last = None
+
+    # ---------------- asyncio API ----------------
+    async def allocate(self, scenario="Base", wacc=0.11, budget=100, objective="Score"):
+        """(df, spent) for one request, as run_allocation() returns them"""
+        # validated here, so a bad request never joins a batch
+        key = request_key(scenario, wacc, budget, objective)
+
+        start = time.perf_counter()
+        if self._first is None:
+            self._first = start
+        self._counts["requests"] += 1
+        count("service.requests")
+
+        result = self.results.get(key)
+        if result is not None:
+            self._counts["cached"] += 1
+            count("service.cached")
+        else:
+            future = self._inflight.get(key)
+            if future is not None:
+                self._counts["deduplicated"] += 1
+                count("service.deduplicated")
+            else:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[key] = future
+                await self._ensure_batcher()
+                self._queue.put_nowait(key)
+            try:
+                result = await asyncio.shield(future)
+            except Exception:
+                self._counts["failed"] += 1
+                raise
+
+        self._last = time.perf_counter()
+        self._latencies.append(self._last - start)
+        self._counts["completed"] += 1
+
+        # callers share one result; each gets its own frame, whose columns
+        # copy-on-write keeps shared until either side writes to them
+        df, spent = result
+        return df.copy(deep=False), spent
+
+    async def _ensure_batcher(self):
+        if self._batcher is None or self._batcher.done():
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        """Collects a batch for up to `window` seconds after its first request, then runs it"""
+        loop = asyncio.get_running_loop()
+        while True:
+            keys = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(keys) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    keys.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self._counts["batches"] += 1
+            self._counts["batched"] += len(keys)
+            count("service.batches")
+            try:
+                results = await loop.run_in_executor(self._executor, self._run_batch, keys)
+            except Exception as exc:
+                results = {key: exc for key in keys}
+
+            for key in keys:
+                future = self._inflight.pop(key)
+                result = results[key]
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    self.results.put(key, result)
+                    future.set_result(result)
+
+    # ---------------- batch computation (executor thread) ----------------
+    def _run_batch(self, keys):
+        with span("service.batch", size=len(keys)):
+            if self.forecasts is None:
+                self.forecasts = forecast_inputs(self.historical)
+            revenue, cost = self.forecasts
+
+            # kept scenarios are reused; the batch's new ones are evaluated together
+            evaluations = {}
+            for scenario, _, _, _ in keys:
+                if scenario in self.evaluations:
+                    self.evaluations.move_to_end(scenario)
+                    evaluations[scenario] = self.evaluations[scenario]
+            new = [s for s in dict.fromkeys(key[0] for key in keys) if s not in evaluations]
+            failed = self._evaluate(new, revenue, cost, evaluations) if new else {}
+
+            # one scored store per scenario, WACC and objective; one solve per budget
+            groups = {}
+            for key in keys:
+                groups.setdefault((key[0], key[1], key[3]), []).append(key)
+            results = {}
+            for (scenario, wacc, objective), members in groups.items():
+                if scenario in failed:
+                    results.update((key, failed[scenario]) for key in members)
+                    continue
+                try:
+                    store = ProjectStore.from_evaluation(evaluations[scenario], wacc).score()
+                    for key in members:
+                        spent = store.allocate(
+                            budget=key[2], objective=objective, time_limit=self.time_limit
+                        )
+                        results[key] = (store.frame(), spent)
+                except Exception as exc:
+                    results.update((key, exc) for key in members)
+            return results
+
+    def _evaluate(self, scenarios, revenue, cost, evaluations):
+        """
+        Evaluates new scenarios together over WACC_GRID in one call, into
+        evaluations and the kept LRU. If that call fails each scenario is
+        retried alone, so a failure only reaches its own requests; returns
+        {scenario: exception}.
+        """
+        try:
+            self._evaluate_together(scenarios, revenue, cost, evaluations)
+            return {}
+        except Exception as exc:
+            if len(scenarios) == 1:
+                return {scenarios[0]: exc}
+        failed = {}
+        for scenario in scenarios:
+            try:
+                self._evaluate_together([scenario], revenue, cost, evaluations)
+            except Exception as exc:
+                failed[scenario] = exc
+        return failed
+
+    def _evaluate_together(self, scenarios, revenue, cost, evaluations):
+        names = {scenario: _scenario_name(scenario) for scenario in scenarios}
+        # unit cash flows are kept (one matrix shared by the batch) to
+        # price WACCs off the grid
+        evaluation = evaluate_scenarios(
+            self.projects, revenue, cost,
+            {names[s]: None if isinstance(s, str) else s for s in scenarios}, WACC_GRID
+        )
+        count("service.evaluated", len(scenarios))
+        for scenario in scenarios:
+            evaluations[scenario] = self.evaluations[scenario] = scenario_slice(evaluation, names[scenario])
+        while len(self.evaluations) > self.max_evaluations:
+            self.evaluations.popitem(last=False)
+
+    # ---------------- thread API ----------------
+    def start(self):
+        """Runs the service on its own event loop thread, for submit()"""
+        if self._thread is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever, name="allocation-service", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def submit(self, scenario="Base", wacc=0.11, budget=100, objective="Score", timeout=None):
+        """Blocking allocate() for any thread; needs start()"""
+        if self._loop is None:
+            raise RuntimeError("AllocationService.submit() needs start() first")
+        return asyncio.run_coroutine_threadsafe(
+            self.allocate(scenario, wacc, budget, objective), self._loop
+        ).result(timeout)
+
+    async def aclose(self):
+        """Stops batching on the current loop; call before the loop closes"""
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+
+    def stop(self):
+        """Stops the loop thread started by start()"""
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self.aclose(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = self._thread = None
+        self._executor.shutdown(wait=False)
+
+    # ---------------- metrics ----------------
+    def stats(self):
+        """Request counters, latency percentiles (ms) and throughput (requests/s)"""
+        latencies = np.array(self._latencies) * 1000
+        elapsed = (self._last - self._first) if self._last is not None else 0.0
+        stats = dict(self._counts)
+        stats.update({
+            "mean_batch": self._counts["batched"] / self._counts["batches"] if self._counts["batches"] else 0.0,
+            "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else float("nan"),
+            "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else float("nan"),
+            "throughput": self._counts["completed"] / elapsed if elapsed > 0 else float("nan"),
+        })
+        return stats
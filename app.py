@@ -1,13 +1,14 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
-from data_generation import *
-from forecasting import *
-from financial_metrics import *
-from allocation_model import *
-from chatbot_logic import get_predefined_answers
+# Heavy dependencies (scikit-learn, numpy_financial, matplotlib) are
+# imported inside the pages that use them, so reruns of the other pages
+# never load them; charts only import matplotlib on a PNG cache miss.
+from data_generation import generate_historical_data, generate_project_data
+from utils import stage_timer
+import instrumentation
+from instrumentation import span
 
 st.set_page_config(layout="wide")
 
@@ -17,16 +18,68 @@ page = st.sidebar.radio(
     [" Company Overview",
      " Forecasting",
      " Capital Allocation",
-     " Explainer Chatbot"]
+     " Explainer Chatbot"],
+    key="page"
 )
 
 scenario = st.sidebar.selectbox("Scenario", ["Base", "Best", "Worst"])
 wacc = st.sidebar.slider("Cost of Capital (WACC)", 0.09, 0.13, 0.11, 0.01)
+budget = st.sidebar.slider("Capital Budget (₹ Cr)", 50, 200, 100, 10)
+
+# sessions run on their own threads; each records into its own Recorder
+diagnostics = st.sidebar.checkbox("Diagnostics")
+if "recorder" not in st.session_state:
+    st.session_state.recorder = instrumentation.Recorder()
+instrumentation.use(st.session_state.recorder)
+instrumentation.enable(diagnostics)
+if diagnostics:
+    instrumentation.reset()
 
 # ---------------- DATA ----------------
 historical = generate_historical_data()
 projects = generate_project_data()
 
+
+@st.cache_data(show_spinner=False)
+def scenario_evaluation(projects, forecast_revenue, forecast_cost, scenario):
+    """Cash flows and WACC-grid NPVs, computed once per scenario and forecast"""
+    from evaluation import evaluate_scenario
+
+    return evaluate_scenario(projects, forecast_revenue, forecast_cost, scenario)
+
+
+@st.cache_data(show_spinner=False)
+def comparison_evaluation(projects, forecast_revenue, forecast_cost, shocks):
+    """All scenarios in one pass; shocks is a tuple of (name, (revenue, cost factors))"""
+    from evaluation import evaluate_scenarios
+
+    return evaluate_scenarios(
+        projects, forecast_revenue, forecast_cost, dict(shocks), keep_cashflows=False
+    )
+
+
+@st.cache_data(show_spinner=False)
+def run_inputs(projects, historical):
+    """Hash of the catalog and historical data that keys stored runs"""
+    from results_store import inputs_digest
+
+    return inputs_digest(projects, historical)
+
+
+@st.cache_data(show_spinner=False)
+def factor_model():
+    """
+    Illustrative industry + macro factor model, estimated on a random
+    synthetic peer panel: the company's own history is one consolidated
+    series with no industry split, too little to estimate it from. Its
+    within-industry correlations (about 0.05-0.09) are placeholders, not
+    measured co-movement.
+    """
+    from data_generation import iter_historical_panel
+    from portfolio_risk import estimate_factor_model
+
+    return estimate_factor_model(pd.concat(iter_historical_panel(2_000, seed=0)))
+
 # ---------------- PAGE 1 ----------------
 if page == " Company Overview":
     st.title("AI-Driven Capital Allocation Advisor")
@@ -47,6 +100,9 @@ All values in ₹ Crore (INR Cr).
 
 # ---------------- PAGE 2 ----------------
 if page == " Forecasting":
+    from charts import forecast_png
+    from forecasting import train_and_select_model
+
     st.markdown("##  AI Forecasting")
     st.markdown(
         """
@@ -63,7 +119,8 @@ if page == " Forecasting":
         ["Revenue", "Operating_Cost"]
     )
 
-    best_name, best_model, results = train_and_select_model(historical, target)
+    with span("app.forecasting"):
+        best_name, best_model, results = train_and_select_model(historical, target)
 
     # ---------------- MODEL COMPARISON ----------------
     st.subheader(" Model Performance Comparison")
@@ -99,15 +156,8 @@ if page == " Forecasting":
     y_actual = historical[target]
     y_pred = best_model.predict(X)
 
-    fig, ax = plt.subplots()
-    ax.plot(historical["Year"], y_actual, label="Actual", marker="o")
-    ax.plot(historical["Year"], y_pred, label="Forecast", marker="o", linestyle="--")
-    ax.set_xlabel("Year")
-    ax.set_ylabel(f"{target} (₹ Cr)")
-    ax.set_title(f"Actual vs Forecasted {target}")
-    ax.legend()
-
-    st.pyplot(fig)
+    with span("render.forecast_chart"):
+        st.image(forecast_png(historical["Year"], y_actual, y_pred, target))
 
     st.markdown(
         """
@@ -182,6 +232,12 @@ if page == " Forecasting":
 
 # ---------------- PAGE 3: CAPITAL ALLOCATION ----------------
 if page == " Capital Allocation":
+    from charts import frontier_png, risk_return_png
+    from allocation_model import FUNDED, ProjectStore, allocate, efficient_frontier, AllocationSession
+    from pipeline import forecast_inputs
+    from portfolio_risk import PortfolioRisk
+    from results_store import default_store, run_key
+    from scenario_analysis import simulate_npv
 
     st.header(f"Capital Allocation – {scenario} Scenario")
 
@@ -192,47 +248,231 @@ if page == " Capital Allocation":
         """
     )
 
-    # --------- FORECAST INPUTS ----------
-    _, rev_model, _ = train_and_select_model(historical, "Revenue")
-    _, cost_model, _ = train_and_select_model(historical, "Operating_Cost")
+    timings = {}
 
-    latest_inputs = historical[["Year", "Inflation (%)", "Demand_Index"]].iloc[[-1]]
-    forecast_revenue = rev_model.predict(latest_inputs)[0]
-    forecast_cost = cost_model.predict(latest_inputs)[0]
+    # --------- FORECAST INPUTS ----------
+    with stage_timer(timings, "Forecasting"):
+        forecast_revenue, forecast_cost = forecast_inputs(historical)
 
     # --------- PROJECT EVALUATION ----------
-    records = []
-    for _, p in projects.iterrows():
-        cf = cashflows(
-            forecast_revenue,
-            forecast_cost,
-            p["Project_Life (Years)"],
-            scenario
+    # Cash flows, IRR, payback and risk only change with the scenario and
+    # forecasts; a WACC move just reads another column of the NPV grid.
+    with stage_timer(timings, "Cash flows & metrics"):
+        evaluation = scenario_evaluation(
+            projects, forecast_revenue, forecast_cost, scenario
         )
 
-        records.append({
-            "Project_ID": p["Project_ID"],
-            "Investment": p["Initial_Investment (₹ Cr)"],
-            "NPV": npv(cf, p["Initial_Investment (₹ Cr)"], wacc),
-            "IRR": irr(cf, p["Initial_Investment (₹ Cr)"]),
-            "Payback": payback(cf, p["Initial_Investment (₹ Cr)"]),
-            "Risk": risk(cf)
-        })
-
-    df = pd.DataFrame(records)
+    # Metrics are read as views of the evaluation into a columnar store;
+    # scoring adds float32 normalised columns rather than a DataFrame copy
+    with stage_timer(timings, "NPV at WACC"):
+        store = ProjectStore.from_evaluation(evaluation, wacc)
 
     # --------- SCORING & ALLOCATION ----------
-    df = score_projects(df)
-    df, spent = allocate(df)
+    with stage_timer(timings, "Scoring"):
+        df = store.score().frame()
+
+    with stage_timer(timings, "Portfolio risk model"):
+        risk_model = PortfolioRisk.from_projects(factor_model(), projects)
+
+    risk_budget = None
+    if st.checkbox("Cap portfolio risk", help="Uses the illustrative factor model below"):
+        uncapped = risk_model.volatility(np.ones(len(projects)))
+        risk_budget = st.slider(
+            "Risk budget (₹ Cr portfolio volatility)",
+            0.0, float(np.ceil(uncapped * 10) / 10), float(np.round(uncapped * 0.6, 1)), 0.1
+        )
+
+    # The session keeps the last solution, so budget, scenario and WACC
+    # what-ifs only re-solve what changed
+    # Every run is persisted by a hash of its inputs and parameters; the
+    # slow risk-capped solve is a memory-mapped load when it repeats
+    run = run_key(
+        run_inputs(projects, historical), scenario, wacc, budget, risk_budget=risk_budget
+    )
+    with stage_timer(timings, "Allocation"):
+        stored = default_store.get(run) if risk_budget is not None else None
+        if stored is not None:
+            df, spent = stored
+            flipped = []
+        elif risk_budget is not None:
+            df, spent = allocate(df, budget=budget, risk=risk_model, risk_budget=risk_budget)
+            flipped = []
+        else:
+            session = st.session_state.get("allocation_session")
+            if session is not None:
+                try:
+                    flipped = session.update(df, budget=budget)
+                except ValueError:
+                    session = None
+            if session is None:
+                session = AllocationSession(df, budget=budget, max_budget=200)
+                st.session_state["allocation_session"] = session
+                flipped = session.flipped
+            df, spent = session.result()
+            funded = df["Decision"].eq(FUNDED).to_numpy()
+            df.attrs["allocation"] = dict(
+                df.attrs["allocation"], risk=risk_model.volatility(funded)
+            )
+
+    if run not in default_store:
+        with span("app.store_run"):
+            default_store.put(run, df, spent, scenario=scenario, wacc=wacc, budget=budget,
+                              objective="Score", risk_budget=risk_budget)
+    # the store is shared; the chatbot only falls back to this session's runs
+    session_runs = st.session_state.setdefault("stored_runs", [])
+    if run not in session_runs:
+        session_runs.append(run)
+
+    # Save for chatbot, with the answer index built once per allocation
+    from chatbot_logic import AnswerIndex
 
-    # Save for chatbot
     st.session_state["allocation_df"] = df
+    with span("app.answer_index"):
+        st.session_state["allocation_index"] = AnswerIndex(df, industry=projects["Industry"])
 
     # --------- RESULTS TABLE ----------
     st.subheader(" Project Evaluation & Allocation Results")
     st.dataframe(df)
 
-    st.success(f"Capital Used: ₹{spent} Cr | Capital Unused: ₹{100 - spent} Cr")
+    st.success(f"Capital Used: ₹{spent} Cr | Capital Unused: ₹{budget - spent} Cr")
+
+    if len(flipped):
+        st.caption("Changed since the last run: " + ", ".join(
+            f"{pid} → {decision.split(' ')[0]}"
+            for pid, decision in zip(flipped["Project_ID"], flipped["Decision"])
+        ))
+
+    solver = df.attrs["allocation"]
+    if risk_budget is not None:
+        st.info(
+            f"Risk budget holds portfolio volatility to ₹{solver['risk']:.2f} Cr; "
+            f"the portfolio keeps {1 - solver['gap']:.1%} of the uncapped best score."
+        )
+    elif not solver["optimal"]:
+        st.warning(
+            f"Optimiser stopped early; the allocation is within "
+            f"{solver['gap']:.2%} of the best achievable score."
+        )
+
+    with st.expander(f"Portfolio risk – ₹{solver['risk']:.2f} Cr volatility"):
+        funded = df["Decision"].eq(FUNDED).to_numpy()
+        st.markdown(
+            "Volatility of the funded portfolio's annual value from an industry + macro "
+            "factor model, so projects in industries that move together add more risk "
+            "than their standalone figures suggest. Contributions sum to the total."
+        )
+        st.caption(
+            "Illustrative: the factor model is estimated on a synthetic peer panel, not on "
+            "Apex's own history, so these figures show the method rather than measured risk."
+        )
+        st.dataframe(pd.DataFrame({
+            "Project_ID": df["Project_ID"],
+            "Industry": projects["Industry"],
+            "Risk Contribution (₹ Cr)": risk_model.contributions(funded).round(3),
+            "Marginal Risk (₹ Cr per project)": risk_model.marginal(funded).round(3)
+        }), hide_index=True)
+        st.dataframe(
+            risk_model.factor_exposure(funded).round(2).rename("Exposure (₹ Cr)"),
+        )
+
+    with st.expander("Stage timings"):
+        st.dataframe(pd.DataFrame({
+            "Stage": list(timings),
+            "Time (ms)": [round(1000 * t, 2) for t in timings.values()]
+        }))
+
+    with st.expander("Stored runs"):
+        runs = default_store.list()
+        st.dataframe(runs.drop(columns=["Created"]), hide_index=True)
+        if len(runs) > 1:
+            other = st.selectbox("Compare this run with", [k for k in runs["Key"] if k != run])
+            changes = default_store.diff(other, run)
+            st.caption(f"{len(changes):,} projects change decision (a = selected run, b = this run).")
+            st.dataframe(changes, hide_index=True)
+
+    # --------- EFFICIENT FRONTIER ----------
+    st.markdown("---")
+    st.subheader(" Value Across Budgets")
+
+    st.markdown(
+        """
+        The curve shows the best achievable portfolio score for every budget level,
+        so alternative budgets can be compared without re-running the allocation.
+        """
+    )
+
+    curve, _ = efficient_frontier(df, max_budget=200)
+
+    with span("render.frontier_chart"):
+        st.image(frontier_png(curve["Budget"], curve["Value"], budget))
+
+    # --------- MONTE CARLO RISK ----------
+    st.markdown("---")
+    st.subheader(" Monte Carlo Risk Profile")
+
+    if st.checkbox("Simulate NPV distributions"):
+        paths = st.select_slider(
+            "Simulated paths", [1_000, 10_000, 100_000, 1_000_000], value=10_000
+        )
+        mc = simulate_npv(
+            projects["Initial_Investment (₹ Cr)"].to_numpy(dtype=float),
+            projects["Project_Life (Years)"].to_numpy(dtype=int),
+            forecast_revenue,
+            forecast_cost,
+            scenario,
+            wacc,
+            n_paths=paths,
+            seed=42
+        )
+        mc.insert(0, "Project_ID", projects["Project_ID"].to_numpy())
+        st.dataframe(mc.round(2))
+
+        st.markdown(
+            """
+            Revenue, cost, growth and inflation are shocked jointly each year.
+            **VaR** and **CVaR** are the 5% tail losses in ₹ Crore (negative values
+            mean even the tail outcome is profitable).
+            """
+        )
+
+    # --------- SCENARIO COMPARISON ----------
+    st.markdown("---")
+    st.subheader(" Scenario Comparison")
+
+    if st.checkbox("Compare all scenarios"):
+        from pipeline import scenario_comparison
+        from scenario_analysis import SCENARIOS
+
+        shocks = dict(SCENARIOS)
+        with st.expander("Custom shock set"):
+            name = st.text_input("Scenario name", "Custom").strip() or "Custom"
+            revenue_shock = st.slider("Revenue shock (%)", -40, 40, -10, 5)
+            cost_shock = st.slider("Operating cost shock (%)", -20, 40, 15, 5)
+            if st.checkbox("Include custom scenario") and name not in shocks:
+                shocks[name] = (1 + revenue_shock / 100, 1 + cost_shock / 100)
+
+        # Forecasts are shared; each scenario is one slice of the same NPV grid
+        with span("scenario_comparison"):
+            comparison = comparison_evaluation(
+                projects, forecast_revenue, forecast_cost, tuple(shocks.items())
+            )
+            table, summary = scenario_comparison(comparison, wacc, budget)
+
+        st.dataframe(summary.round(2), hide_index=True)
+        st.dataframe(
+            table.style.apply(
+                lambda row: ["background-color: #fff3cd" if row["Changed"] else ""] * len(row),
+                axis=1
+            ).format(precision=2),
+            hide_index=True
+        )
+        st.markdown(
+            f"""
+            Every scenario is allocated at the same WACC and ₹{budget} Cr budget.
+            **NPV Δ** columns compare each scenario with Base, and **Changed** marks
+            projects whose funding decision depends on the scenario.
+            """
+        )
 
     # --------- SCENARIO EXPLANATION ----------
     st.markdown("---")
@@ -286,34 +526,16 @@ if page == " Capital Allocation":
         )
 
     # --------- IMPROVED RISK VS RETURN GRAPH ----------
-    fig, ax = plt.subplots(figsize=(9, 6))
-
-    # Color code selected vs rejected
-    colors = df["Decision"].apply(
-        lambda x: "green" if "Selected" in x else "red"
-    )
-
-    ax.scatter(df["Risk"], df["NPV"], c=colors, s=120, alpha=0.8)
-
-    # Annotate points
-    for _, row in df.iterrows():
-        ax.annotate(
-            row["Project_ID"],
-            (row["Risk"], row["NPV"]),
-            textcoords="offset points",
-            xytext=(6, 6),
-            fontsize=10
-        )
-
-    # Reference lines
-    ax.axhline(df["NPV"].median(), linestyle="--", alpha=0.4)
-    ax.axvline(df["Risk"].median(), linestyle="--", alpha=0.4)
-
-    ax.set_xlabel("Risk (Cash-Flow Volatility)")
-    ax.set_ylabel("Return (NPV in ₹ Crore)")
-    ax.set_title(f"Project Risk vs Return – {scenario} Scenario")
-
-    st.pyplot(fig)
+    # Cached by the plotted data and scenario; large portfolios switch to
+    # a density plot with only the notable projects labelled
+    with span("render.risk_return_chart"):
+        st.image(risk_return_png(
+            df["Project_ID"].to_numpy(),
+            df["Risk"].to_numpy(dtype=float),
+            df["NPV"].to_numpy(dtype=float),
+            df["Decision"].eq(FUNDED).to_numpy(),
+            f"Project Risk vs Return – {scenario} Scenario"
+        ))
 
     st.info(
         """
@@ -343,6 +565,8 @@ if page == " Capital Allocation":
 
 # ---------------- PAGE 4 ----------------
 if page == " Explainer Chatbot":
+    from chatbot_logic import AnswerIndex, get_predefined_answers
+
     st.markdown("##  Capital Allocation Explainer")
     st.markdown(
         """
@@ -355,11 +579,37 @@ if page == " Explainer Chatbot":
 
     st.markdown("---")
 
+    # Without an allocation in memory, explain this session's most recent stored run
+    if "allocation_df" not in st.session_state:
+        from results_store import default_store
+
+        latest = default_store.latest(st.session_state.get("stored_runs", []))
+        stored = default_store.get(latest) if latest is not None else None
+        if stored is not None:
+            st.session_state["allocation_df"] = stored[0]
+            params = default_store.meta(latest)["params"]
+            st.caption(
+                f"Explaining the last stored run: {params['scenario']} scenario, "
+                f"WACC {params['wacc']:.0%}, budget ₹{params['budget']:g} Cr."
+            )
+
     if "allocation_df" not in st.session_state:
         st.warning("⚠️ Please run the Capital Allocation step first.")
     else:
-        df = st.session_state["allocation_df"]
-        answers = get_predefined_answers(df)
+        index = st.session_state.get("allocation_index")
+        if index is None:
+            index = AnswerIndex(st.session_state["allocation_df"])
+            st.session_state["allocation_index"] = index
+
+        page_size = 50
+        pages = max(index.count("Selected"), index.count("Rejected"), 1)
+        pages = (pages - 1) // page_size + 1
+        id_page = 0
+        if pages > 1:
+            id_page = st.number_input("Project list page", 1, pages, 1) - 1
+
+        with span("app.chatbot_answers"):
+            answers = get_predefined_answers(index, id_page, page_size)
 
         # Layout: Left = questions | Right = answer
         col1, col2 = st.columns([1, 2])
@@ -390,6 +640,22 @@ if page == " Explainer Chatbot":
                 unsafe_allow_html=True
             )
 
+        st.markdown("---")
+        st.markdown("###  Ask About the Portfolio")
+        question = st.text_input(
+            "Question", placeholder="e.g. top 10 by NPV in Energy, lowest 5 by risk selected"
+        )
+        if question:
+            answer = index.ask(question)
+            if answer is None:
+                st.info(
+                    "Try questions like **top 10 by NPV in Energy**, **lowest 5 by risk "
+                    "selected** or **highest 3 by IRR rejected**. Rankable metrics: "
+                    + ", ".join(index.values) + "; industries: " + ", ".join(index.industries) + "."
+                )
+            else:
+                st.markdown(answer)
+
         st.markdown("---")
 
         st.markdown(
@@ -402,3 +668,17 @@ if page == " Explainer Chatbot":
             unsafe_allow_html=True
         )
 
+
+# ---------------- DIAGNOSTICS ----------------
+if diagnostics:
+    with st.sidebar.expander("Diagnostics", expanded=True):
+        st.dataframe(instrumentation.summary(), hide_index=True)
+        st.json(instrumentation.counters())
+        st.download_button(
+            "Export JSON", instrumentation.export_json(),
+            "trace.json", "application/json"
+        )
+        st.download_button(
+            "Export Chrome trace", instrumentation.export_chrome_trace(),
+            "chrome_trace.json", "application/json"
+        )
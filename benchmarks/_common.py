@@ -0,0 +1,68 @@
+"""
+Plumbing shared by the benchmark scripts: the repository on sys.path,
+run metadata, and writing results with the --baseline regression check.
+
+    from _common import add_output_arguments, meta, write_results
+
+With --baseline, rows whose metric grew by more than baseline *
+(1 + threshold) are reported as regressions and the exit code is 1.
+"""
+import json
+import os
+import platform
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def add_output_arguments(parser, output, growth="slowdown"):
+    """--output, --baseline and --threshold on a script's parser"""
+    parser.add_argument("--output", default=output)
+    parser.add_argument("--baseline", help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help=f"allowed {growth}, e.g. 0.2 = 20%%")
+
+
+def meta(**params):
+    """Python, machine and the versions of numpy / pandas if loaded, plus the run's parameters"""
+    info = {"python": platform.python_version(), "machine": platform.machine()}
+    for module in ("numpy", "pandas"):
+        if module in sys.modules:
+            info[module] = sys.modules[module].__version__
+    info.update(params)
+    return info
+
+
+def compare(rows, baseline_rows, key, metric, threshold):
+    """Rows whose metric grew by more than threshold over the baseline row with the same key."""
+    before = {tuple(r[k] for k in key): r[metric] for r in baseline_rows}
+    regressions = []
+    for r in rows:
+        old = before.get(tuple(r[k] for k in key))
+        if old and r[metric] > old * (1 + threshold):
+            regressions.append({**r, "baseline": old, "ratio": r[metric] / old})
+    return regressions
+
+
+def _label(row, key):
+    return " @ ".join(f"{row[k]:,}" if isinstance(row[k], int) else str(row[k]) for k in key)
+
+
+def write_results(args, results, key, metric, unit, section="results"):
+    """
+    Writes results to args.output and returns the exit code: 1 if
+    args.baseline is given and results[section] regressed on metric,
+    else 0. unit formats a metric value for the REGRESSION lines.
+    """
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results[section], baseline[section], key, metric, args.threshold)
+    for r in regressions:
+        print(f"REGRESSION {_label(r, key)}: {unit(r['baseline'])} -> {unit(r[metric])} ({r['ratio']:.2f}x)")
+    return 1 if regressions else 0
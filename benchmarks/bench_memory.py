@@ -0,0 +1,146 @@
+"""
+Peak resident memory of scoring + allocation on a DataFrame versus a ProjectStore.
+
+    python benchmarks/bench_memory.py --sizes 100000 1000000 --output memory.json
+    python benchmarks/bench_memory.py --output new.json --baseline memory.json
+
+Each size is evaluated once and saved; every path then runs in a fresh
+interpreter that loads the evaluation, restarts its RSS high-water mark
+(on Linux) and reports how far above the starting RSS the path peaked.
+"frame" is metrics_at -> score_projects -> allocate, "store" is the same
+run on a ProjectStore.
+With --baseline, paths whose peak grew by more than the threshold are
+reported as regressions and the exit code is 1.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from _common import add_output_arguments, meta, write_results
+
+PATHS = ["frame", "store"]
+
+
+def reset_peak():
+    """Restart the RSS high-water mark where the kernel allows it (Linux)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mib():
+    """RSS high-water mark: VmHWM on Linux, else ru_maxrss (KiB on Linux, bytes on macOS)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 2 ** 10
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2 ** 20 if sys.platform == "darwin" else rss / 2 ** 10
+
+
+def current_rss_mib():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return peak_rss_mib()
+
+
+def save_evaluation(n, seed, wacc, path):
+    from data_generation import iter_project_catalog
+    from evaluation import evaluate_scenario
+
+    projects = next(iter_project_catalog(n, seed=seed, chunk_size=n))
+    evaluation = evaluate_scenario(projects, 165.0, 92.0, "Base", [wacc], keep_cashflows=False)
+    np.savez(path, **{k: v for k, v in evaluation.items() if v is not None})
+
+
+def run_path(name, path, time_limit):
+    """One path on a saved evaluation; runs inside the child process."""
+    from allocation_model import ProjectStore, allocate, score_projects
+    from evaluation import metrics_at
+
+    saved = np.load(path, allow_pickle=True)
+    evaluation = {k: saved[k] for k in saved.files}
+    evaluation["cashflows"] = None
+    wacc = float(evaluation["waccs"][0])
+    budget = 0.2 * evaluation["Investment"].sum()
+
+    reset_peak()
+    before = current_rss_mib()
+    start = time.perf_counter()
+    if name == "frame":
+        df, spent = allocate(score_projects(metrics_at(evaluation, wacc)), budget, time_limit=time_limit)
+    else:
+        store = ProjectStore.from_evaluation(evaluation, wacc).score()
+        spent = store.allocate(budget, time_limit=time_limit)
+        df = store.frame()
+    seconds = time.perf_counter() - start
+
+    return {
+        "path": name,
+        "size": len(df),
+        "seconds": seconds,
+        "peak_mib": peak_rss_mib() - before,
+        "result_mib": df.memory_usage(deep=False).sum() / 2 ** 20,
+        "spent": float(spent),
+    }
+
+
+def measure(name, path, time_limit):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", name, path,
+         "--time-limit", str(time_limit)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100_000, 1_000_000])
+    parser.add_argument("--paths", nargs="+", default=PATHS, choices=PATHS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--wacc", type=float, default=0.11)
+    parser.add_argument("--time-limit", type=float, default=2.0, help="allocation solver time limit in seconds")
+    add_output_arguments(parser, "memory.json", growth="growth")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_path(*args.child, args.time_limit)))
+        return 0
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = os.path.join(tmp, f"evaluation_{n}.npz")
+            save_evaluation(n, args.seed, args.wacc, path)
+            for name in args.paths:
+                row = measure(name, path, args.time_limit)
+                print(f"{name:<6} {n:>9,}  peak +{row['peak_mib']:>8.1f} MiB  "
+                      f"table {row['result_mib']:>7.1f} MiB  {row['seconds'] * 1000:>9.1f} ms")
+                rows.append(row)
+
+    results = {
+        "meta": meta(seed=args.seed, wacc=args.wacc, time_limit=args.time_limit),
+        "results": rows
+    }
+    return write_results(args, results, ("path", "size"), "peak_mib", lambda m: f"{m:.1f} MiB")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
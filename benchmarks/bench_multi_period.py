@@ -0,0 +1,146 @@
+"""
+Multi-period capital rationing: Lagrangian solver versus exhaustive search.
+
+    python benchmarks/bench_multi_period.py --sizes 10 15 20 --trials 20 --output multi_period.json
+    python benchmarks/bench_multi_period.py --output new.json --baseline multi_period.json
+
+Small catalogs (up to --exhaustive-limit projects) are also solved by
+enumerating every subset, which gives the true optimum: the report shows
+how far the solver's value falls short of it, how often it finds it, and
+checks that the solver's upper bound never undercuts it. Larger sizes
+are timed with the solver's own bound and gap only.
+With --baseline, sizes slower than baseline * (1 + threshold) are
+reported as regressions and the exit code is 1.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from _common import add_output_arguments, meta, write_results
+from data_generation import iter_project_catalog
+from evaluation import evaluate_scenario, metrics_at
+from allocation_model import score_projects, solve_multi_period, spend_schedule
+
+
+def instance(n, years, tightness, seed):
+    """Scored projects, their spend per year and per-year budgets at a share of total demand"""
+    projects = next(iter_project_catalog(n, seed=seed, chunk_size=n))
+    evaluation = evaluate_scenario(projects, 165.0, 92.0, "Base", [0.11], keep_cashflows=False)
+    scored = score_projects(metrics_at(evaluation, 0.11))
+    rng = np.random.default_rng(seed)
+    start = rng.integers(0, years, n)
+    spend = spend_schedule(scored["Investment"], projects["Project_Life (Years)"], years, start)
+    budgets = tightness * spend.sum(axis=0) * rng.uniform(0.7, 1.3, years)
+    return scored["Score"].to_numpy(dtype=float), spend, budgets
+
+
+def solve_exhaustive(values, spend, budgets, block=1 << 16):
+    """Best subset by enumerating all 2^n of them in blocks; for small n only"""
+    n = len(values)
+    bits = 1 << np.arange(n, dtype=np.int64)
+    best_value, best = 0.0, np.zeros(n, dtype=bool)
+    for lo in range(0, 1 << n, block):
+        masks = np.arange(lo, min(lo + block, 1 << n), dtype=np.int64)
+        chosen = (masks[:, None] & bits) != 0
+        feasible = (chosen @ spend <= budgets + 1e-9).all(axis=1)
+        totals = np.where(feasible, chosen @ values, -np.inf)
+        i = int(np.argmax(totals))
+        if totals[i] > best_value:
+            best_value, best = totals[i], chosen[i]
+    return best, best_value
+
+
+def run_size(n, trials, years, tightness, limit, seed, time_limit):
+    rows = []
+    for trial in range(trials):
+        values, spend, budgets = instance(n, years, tightness, seed + trial)
+        start = time.perf_counter()
+        selected, info = solve_multi_period(values, spend, budgets, time_limit=time_limit)
+        seconds = time.perf_counter() - start
+
+        row = {"size": n, "trial": trial, "seconds": seconds, "value": info["value"],
+               "bound": info["bound"], "gap": info["gap"], "iterations": info["iterations"],
+               "feasible": bool((spend[selected].sum(axis=0) <= budgets + 1e-9).all())}
+        if n <= limit:
+            start = time.perf_counter()
+            _, exact = solve_exhaustive(values, spend, budgets)
+            row.update({
+                "exact": exact,
+                "exact_seconds": time.perf_counter() - start,
+                "shortfall": (exact - info["value"]) / exact if exact else 0.0,
+                "bound_valid": bool(info["bound"] >= exact - 1e-9),
+            })
+        rows.append(row)
+    return rows
+
+
+def summarise(rows):
+    """One line per size: median time, gap and, where known, shortfall against the optimum"""
+    sizes = sorted({r["size"] for r in rows})
+    summary = []
+    for n in sizes:
+        runs = [r for r in rows if r["size"] == n]
+        line = {
+            "size": n,
+            "seconds": float(np.median([r["seconds"] for r in runs])),
+            "median_gap": float(np.median([r["gap"] for r in runs])),
+            "max_gap": float(max(r["gap"] for r in runs)),
+            "feasible": all(r["feasible"] for r in runs),
+        }
+        if "exact" in runs[0]:
+            line.update({
+                "exact_seconds": float(np.median([r["exact_seconds"] for r in runs])),
+                "optimal_share": float(np.mean([r["shortfall"] <= 1e-9 for r in runs])),
+                "max_shortfall": float(max(r["shortfall"] for r in runs)),
+                "bound_valid": all(r["bound_valid"] for r in runs),
+            })
+        summary.append(line)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 15, 20, 10_000, 50_000])
+    parser.add_argument("--trials", type=int, default=10, help="random instances per size")
+    parser.add_argument("--years", type=int, default=5, help="fiscal years with their own budget")
+    parser.add_argument("--tightness", type=float, default=0.3, help="budget as a share of each year's total spend")
+    parser.add_argument("--exhaustive-limit", type=int, default=20, help="largest size also solved exhaustively")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-limit", type=float, default=10.0, help="solver time limit in seconds")
+    add_output_arguments(parser, "multi_period.json")
+    args = parser.parse_args(argv)
+
+    rows = []
+    for n in args.sizes:
+        trials = args.trials if n <= args.exhaustive_limit else min(args.trials, 3)
+        rows += run_size(n, trials, args.years, args.tightness, args.exhaustive_limit,
+                         args.seed, args.time_limit)
+    summary = summarise(rows)
+    for line in summary:
+        text = (f"{line['size']:>9,}  {line['seconds'] * 1000:>9.1f} ms  "
+                f"gap {line['median_gap']:.2e} (max {line['max_gap']:.2e})")
+        if "exact_seconds" in line:
+            text += (f"  optimal {line['optimal_share']:.0%}  shortfall max {line['max_shortfall']:.2e}"
+                     f"  bound {'valid' if line['bound_valid'] else 'INVALID'}"
+                     f"  exhaustive {line['exact_seconds'] * 1000:.1f} ms")
+        print(text)
+
+    results = {
+        "meta": meta(trials=args.trials, years=args.years, tightness=args.tightness,
+                     seed=args.seed, time_limit=args.time_limit),
+        "summary": summary,
+        "results": rows
+    }
+    status = write_results(args, results, ("size",), "seconds", lambda s: f"{s * 1000:.2f} ms",
+                           section="summary")
+
+    if not all(line["feasible"] and line.get("bound_valid", True) for line in summary):
+        print("FAILED: an infeasible selection or an upper bound below the optimum")
+        return 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
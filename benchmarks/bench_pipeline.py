@@ -0,0 +1,114 @@
+"""
+Times and memory-profiles each pipeline stage on synthetic portfolios.
+
+    python benchmarks/bench_pipeline.py --sizes 10 1000 100000 1000000 --output bench.json
+    python benchmarks/bench_pipeline.py --output new.json --baseline bench.json --threshold 0.2
+
+With --baseline, stages slower than baseline * (1 + threshold) are
+reported as regressions and the exit code is 1.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+from _common import add_output_arguments, meta, write_results
+
+from data_generation import generate_historical_data, iter_project_catalog
+from forecasting import train_and_select_model
+from financial_metrics import cashflows, npv, irr, payback, risk, evaluate_portfolio
+from allocation_model import score_projects, allocate
+from chatbot_logic import AnswerIndex, get_predefined_answers
+
+# The per-project scalar functions are only timed up to this many projects
+SCALAR_LIMIT = 10_000
+
+
+def measure(fn, repeat):
+    """Best wall-clock time over repeat runs after a warm-up, then peak traced memory of one run."""
+    result = fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, best, peak / 2 ** 20
+
+
+def scalar_metrics(projects, revenue, cost, scenario, wacc):
+    records = []
+    for inv, life in zip(projects["Initial_Investment (₹ Cr)"], projects["Project_Life (Years)"]):
+        cf = cashflows(revenue, cost, int(life), scenario)
+        records.append((npv(cf, inv, wacc), irr(cf, inv), payback(cf, inv), risk(cf)))
+    return records
+
+
+def run_size(n, historical, repeat, seed, time_limit):
+    projects = next(iter_project_catalog(n, seed=seed, chunk_size=n))
+    revenue, cost, scenario, wacc = 165.0, 92.0, "Base", 0.11
+    budget = 0.2 * projects["Initial_Investment (₹ Cr)"].sum()
+
+    stages = [
+        ("train_and_select_model", lambda: train_and_select_model(historical, "Revenue", cache=None)),
+    ]
+    if n <= SCALAR_LIMIT:
+        stages.append(("metrics_scalar", lambda: scalar_metrics(projects, revenue, cost, scenario, wacc)))
+    stages.append(("metrics_batch", lambda: evaluate_portfolio(projects, revenue, cost, scenario, wacc)))
+
+    rows = []
+    evaluated = None
+    for name, fn in stages:
+        result, seconds, peak = measure(fn, repeat)
+        rows.append({"stage": name, "size": n, "seconds": seconds, "peak_mib": peak})
+        if name == "metrics_batch":
+            evaluated = result
+
+    _, seconds, peak = measure(lambda: score_projects(evaluated.copy()), repeat)
+    rows.append({"stage": "score_projects", "size": n, "seconds": seconds, "peak_mib": peak})
+    scored = score_projects(evaluated.copy())
+
+    allocated, seconds, peak = measure(
+        lambda: allocate(scored.copy(), budget=budget, time_limit=time_limit)[0], repeat
+    )
+    rows.append({"stage": "allocate", "size": n, "seconds": seconds, "peak_mib": peak,
+                 "gap": allocated.attrs["allocation"]["gap"]})
+
+    index, seconds, peak = measure(lambda: AnswerIndex(allocated, projects["Industry"]), repeat)
+    rows.append({"stage": "answer_index", "size": n, "seconds": seconds, "peak_mib": peak})
+
+    _, seconds, peak = measure(lambda: get_predefined_answers(index), repeat)
+    rows.append({"stage": "get_predefined_answers", "size": n, "seconds": seconds, "peak_mib": peak})
+
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-limit", type=float, default=2.0, help="allocate() solver time limit in seconds")
+    add_output_arguments(parser, "bench.json")
+    args = parser.parse_args(argv)
+
+    historical = generate_historical_data()
+    rows = []
+    for n in args.sizes:
+        for row in run_size(n, historical, args.repeat, args.seed, args.time_limit):
+            print(f"{row['stage']:<24} {n:>9,}  {row['seconds'] * 1000:>10.2f} ms  {row['peak_mib']:>8.1f} MiB")
+            rows.append(row)
+
+    results = {
+        "meta": meta(repeat=args.repeat, seed=args.seed, time_limit=args.time_limit),
+        "results": rows
+    }
+    return write_results(args, results, ("stage", "size"), "seconds", lambda s: f"{s * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Load test of the allocation service against per-session pipeline runs.
+
+    python benchmarks/bench_service.py --sessions 8 --requests 10 --output service.json
+    python benchmarks/bench_service.py --output new.json --baseline service.json --threshold 0.2
+
+Each stand-in client is a thread, as a Streamlit session's rerun thread
+would be, sending its requests one after another with a short think
+time. Requests are drawn from a small grid of scenarios, WACCs and
+budgets, so concurrent analysts overlap as they do in practice.
+"direct" runs run_allocation() in every client thread; "service" sends
+the same requests to one shared AllocationService.
+With --baseline, modes whose p99 latency grew by more than the threshold
+are reported as regressions and the exit code is 1.
+"""
+import argparse
+import sys
+import threading
+import time
+
+import numpy as np
+
+from _common import add_output_arguments, meta, write_results
+
+from data_generation import generate_historical_data, iter_project_catalog
+from allocation_service import AllocationService
+from pipeline import run_allocation
+
+MODES = ["direct", "service"]
+SCENARIOS = ["Base", "Best", "Worst"]
+WACCS = [0.10, 0.11, 0.12]
+BUDGET_SHARES = [0.1, 0.2, 0.3]
+
+
+class LocalClient:
+    """Stand-in for one analyst session: sends requests in turn and times each one"""
+
+    def __init__(self, send, requests, think):
+        self.send = send
+        self.requests = requests
+        self.think = think
+        self.latencies = []
+        self.errors = 0
+
+    def run(self):
+        for request in self.requests:
+            start = time.perf_counter()
+            try:
+                self.send(*request)
+            except Exception:
+                self.errors += 1
+            self.latencies.append(time.perf_counter() - start)
+            time.sleep(self.think)
+
+
+def workload(sessions, requests, total_investment, seed):
+    """Per-session request lists of (scenario, wacc, budget) drawn from the grid"""
+    rng = np.random.default_rng(seed)
+    budgets = [round(share * total_investment) for share in BUDGET_SHARES]
+    return [
+        [(str(rng.choice(SCENARIOS)), float(rng.choice(WACCS)), float(rng.choice(budgets)))
+         for _ in range(requests)]
+        for _ in range(sessions)
+    ]
+
+
+def run_mode(mode, projects, historical, requests, think, window, time_limit):
+    service = None
+    if mode == "service":
+        service = AllocationService(projects, historical, window=window, time_limit=time_limit).start()
+        send = service.submit
+    else:
+        def send(scenario, wacc, budget):
+            return run_allocation(projects, historical, scenario, wacc, budget, time_limit=time_limit)
+
+    clients = [LocalClient(send, session, think) for session in requests]
+    threads = [threading.Thread(target=client.run) for client in clients]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    latencies = np.concatenate([client.latencies for client in clients]) * 1000
+    row = {
+        "mode": mode,
+        "requests": len(latencies),
+        "errors": sum(client.errors for client in clients),
+        "seconds": seconds,
+        "throughput": len(latencies) / seconds,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+    if service is not None:
+        stats = service.stats()
+        service.stop()
+        row.update({k: stats[k] for k in ("batches", "mean_batch", "deduplicated", "cached")})
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent stand-in clients")
+    parser.add_argument("--requests", type=int, default=10, help="requests per client")
+    parser.add_argument("--projects", type=int, default=10_000, help="catalog size")
+    parser.add_argument("--think", type=float, default=0.05, help="seconds between a client's requests")
+    parser.add_argument("--window", type=float, default=0.005, help="service batching window in seconds")
+    parser.add_argument("--time-limit", type=float, default=2.0, help="allocation solver time limit in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    add_output_arguments(parser, "service.json")
+    args = parser.parse_args(argv)
+
+    projects = next(iter_project_catalog(args.projects, seed=args.seed, chunk_size=args.projects))
+    historical = generate_historical_data()
+    requests = workload(args.sessions, args.requests,
+                        projects["Initial_Investment (₹ Cr)"].sum(), args.seed)
+
+    rows = []
+    for mode in args.modes:
+        row = run_mode(mode, projects, historical, requests, args.think, args.window, args.time_limit)
+        extra = ""
+        if "batches" in row:
+            extra = (f"  {row['batches']} batches (mean {row['mean_batch']:.1f}), "
+                     f"{row['deduplicated']} deduplicated, {row['cached']} cached")
+        print(f"{mode:<8} {row['requests']:>5} req  {row['throughput']:>8.1f} req/s  "
+              f"p50 {row['p50_ms']:>8.1f} ms  p99 {row['p99_ms']:>8.1f} ms{extra}")
+        rows.append(row)
+
+    results = {
+        "meta": meta(sessions=args.sessions, requests=args.requests, projects=args.projects,
+                     think=args.think, window=args.window, time_limit=args.time_limit, seed=args.seed),
+        "results": rows
+    }
+    return write_results(args, results, ("mode",), "p99_ms", lambda ms: f"{ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
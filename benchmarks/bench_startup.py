@@ -0,0 +1,100 @@
+"""
+Measures Streamlit time-to-first-render and rerun cost for each app page.
+
+    python benchmarks/bench_startup.py --output startup.json
+    python benchmarks/bench_startup.py --app ../old/app.py --output before.json
+    python benchmarks/bench_startup.py --output after.json --baseline before.json
+
+Every page is rendered in a fresh interpreter so module imports are paid
+for again, the way a new Streamlit server process pays for them. The
+rerun time is a second run of the same page in that process. With
+--baseline, pages slower than baseline * (1 + threshold) are reported as
+regressions and the exit code is 1.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from _common import ROOT, add_output_arguments, meta, write_results
+
+PAGES = [" Company Overview", " Forecasting", " Capital Allocation", " Explainer Chatbot"]
+
+# Modules whose presence after a render shows what a page pulled in
+HEAVY_MODULES = ["sklearn", "matplotlib", "numpy_financial"]
+
+
+def render_page(app, page, timeout):
+    """Cold first render and warm rerun of one page; runs inside the child process."""
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    harness = time.perf_counter() - start
+
+    at = AppTest.from_file(app, default_timeout=timeout)
+    at.session_state["page"] = page
+    start = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"{page.strip()}: {at.exception[0].message}")
+
+    start = time.perf_counter()
+    at.run()
+    rerun = time.perf_counter() - start
+
+    return {
+        "page": page.strip(),
+        "first_render_seconds": first,
+        "rerun_seconds": rerun,
+        "harness_seconds": harness,
+        "modules": [m for m in HEAVY_MODULES if m in sys.modules],
+    }
+
+
+def measure(app, page, repeat, timeout):
+    """Best of repeat cold renders, each in its own interpreter."""
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", page,
+             "--app", app, "--timeout", str(timeout)],
+            capture_output=True, text=True, cwd=os.path.dirname(app), check=True
+        )
+        row = json.loads(out.stdout.strip().splitlines()[-1])
+        if best is None or row["first_render_seconds"] < best["first_render_seconds"]:
+            best = row
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--pages", nargs="+", default=[p.strip() for p in PAGES])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-run AppTest timeout in seconds")
+    add_output_arguments(parser, "startup.json")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    app = os.path.abspath(args.app)
+
+    if args.child:
+        sys.path.insert(0, os.path.dirname(app))
+        print(json.dumps(render_page(app, args.child, args.timeout)))
+        return 0
+
+    labels = {p.strip(): p for p in PAGES}
+    rows = []
+    for name in args.pages:
+        row = measure(app, labels[name], args.repeat, args.timeout)
+        print(f"{row['page']:<20} first {row['first_render_seconds'] * 1000:>9.1f} ms  "
+              f"rerun {row['rerun_seconds'] * 1000:>9.1f} ms  loads {', '.join(row['modules']) or '-'}")
+        rows.append(row)
+
+    results = {"meta": meta(app=app, repeat=args.repeat), "results": rows}
+    return write_results(args, results, ("page",), "first_render_seconds", lambda s: f"{s * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
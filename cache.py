@@ -0,0 +1,129 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from instrumentation import count
+
+
+class LRUCache:
+    """
+    In-memory LRU of any values, optionally in front of a directory of
+    pickled entries (directory=None keeps it in memory only).
+
+    The memory tier evicts by entry count, the disk tier by total bytes,
+    and both drop entries older than max_age seconds. The memory tier is
+    locked, so threads can share one cache; hits and misses are counted
+    under name.
+    """
+
+    def __init__(self, directory=None, max_items=32, max_disk_bytes=256 * 2 ** 20,
+                 max_age=7 * 24 * 3600, name="cache"):
+        self.directory = directory
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age = max_age
+        self.name = name
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = {"memory": 0, "disk": 0, "miss": 0}
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored, value = entry
+                if now - stored <= self.max_age:
+                    self._memory.move_to_end(key)
+                    self.hits["memory"] += 1
+                    count(f"{self.name}.memory_hit")
+                    return value
+                del self._memory[key]
+
+        if self.directory is not None:
+            path = self._path(key)
+            try:
+                if now - os.path.getmtime(path) <= self.max_age:
+                    with open(path, "rb") as f:
+                        value = pickle.load(f)
+                    self._remember(key, value, now)
+                    with self._lock:
+                        self.hits["disk"] += 1
+                    count(f"{self.name}.disk_hit")
+                    return value
+                os.remove(path)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+
+        with self._lock:
+            self.hits["miss"] += 1
+        count(f"{self.name}.miss")
+        return None
+
+    def put(self, key, value):
+        self._remember(key, value, time.time())
+
+        if self.directory is None:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # a unique temporary file per writer, so threads never share one
+            with tempfile.NamedTemporaryFile(
+                dir=self.directory, prefix=f"{key}.", suffix=".tmp", delete=False
+            ) as f:
+                try:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                except BaseException:
+                    f.close()
+                    os.remove(f.name)
+                    raise
+            os.replace(f.name, self._path(key))
+            self._evict_disk()
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.directory is None or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                os.remove(os.path.join(self.directory, name))
+
+    def _remember(self, key, value, stored):
+        with self._lock:
+            self._memory[key] = (stored, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """
+        Drops expired entries, then the oldest ones until under the size cap.
+        """
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.directory, name)
+            stat = os.stat(path)
+            if now - stat.st_mtime > self.max_age:
+                os.remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
@@ -0,0 +1,168 @@
+import hashlib
+import io
+
+import numpy as np
+
+from cache import LRUCache
+from instrumentation import count, traced
+
+# Above this many points the risk–return chart is a hexbin density plot
+DENSITY_THRESHOLD = 2_000
+
+# At most this many points are labelled once not every point can be
+MAX_LABELS = 12
+
+# Rendered PNGs by content hash; memory only, so restarts start cold
+chart_cache = LRUCache(max_items=64, name="chart_cache")
+
+
+def chart_key(kind, *parts):
+    """Content hash of a chart kind and the arrays / values it is drawn from"""
+    h = hashlib.sha256(kind.encode())
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            h.update(str(part.dtype).encode())
+            h.update(np.ascontiguousarray(part).tobytes())
+        else:
+            h.update(repr(part).encode())
+    return h.hexdigest()
+
+
+def cached_png(key, draw, size=(9, 6), cache=chart_cache):
+    """
+    PNG bytes for key; draw(fig) only runs on a cache miss. Figures are
+    built with matplotlib.figure.Figure, outside pyplot's global state.
+    """
+    png = cache.get(key) if cache is not None else None
+    if png is not None:
+        return png
+
+    from matplotlib.figure import Figure
+
+    count("charts.render")
+    fig = Figure(figsize=size)
+    draw(fig)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=100, bbox_inches="tight")
+    png = buffer.getvalue()
+    if cache is not None:
+        cache.put(key, png)
+    return png
+
+
+def label_rows(risk, npv, selected, limit=MAX_LABELS, spacing=0.04):
+    """
+    Rows worth labelling on a crowded chart, at most limit: the best-NPV
+    funded projects and the highest / lowest NPV and risk, taken in turn.
+    A candidate closer than spacing (as a fraction of the axis ranges)
+    to an already labelled point is skipped so labels do not pile up.
+    """
+    everything = np.arange(len(npv))
+    depth = 10 * limit
+    rankings = [_largest(np.flatnonzero(selected), npv, depth)] + [
+        _largest(everything, values, depth) for values in (npv, -npv, risk, -risk)
+    ]
+    span = [np.nanmax(v) - np.nanmin(v) or 1.0 for v in (risk, npv)]
+
+    rows, points = [], []
+    for rank in range(depth):
+        for ranking in rankings:
+            if rank >= len(ranking) or ranking[rank] in rows:
+                continue
+            point = np.array([risk[ranking[rank]] / span[0], npv[ranking[rank]] / span[1]])
+            if all(np.abs(point - p).max() >= spacing for p in points):
+                rows.append(ranking[rank])
+                points.append(point)
+            if len(rows) == limit:
+                return np.array(rows, dtype=np.int64)
+    return np.array(rows, dtype=np.int64)
+
+
+def _largest(rows, values, k):
+    """The k rows with the largest finite values, largest first"""
+    rows = rows[np.isfinite(values[rows])]
+    if len(rows) > k:
+        rows = rows[np.argpartition(-values[rows], k - 1)[:k]]
+    return rows[np.argsort(-values[rows], kind="stable")]
+
+
+@traced("charts.risk_return_png")
+def risk_return_png(ids, risk, npv, selected, title, threshold=DENSITY_THRESHOLD,
+                    max_labels=MAX_LABELS, cache=chart_cache):
+    """
+    Risk vs NPV chart as PNG bytes, cached by the data it shows.
+
+    Up to threshold points the chart is a scatter, green for funded and
+    red for rejected projects; above it, a hexbin coloured by the share
+    of funded projects in each cell. Every point is labelled while there
+    are at most max_labels, otherwise only the label_rows() picks.
+    """
+    risk = np.asarray(risk, dtype=float)
+    npv = np.asarray(npv, dtype=float)
+    selected = np.asarray(selected, dtype=bool)
+    n = len(risk)
+
+    labelled = np.arange(n) if n <= max_labels else label_rows(risk, npv, selected, max_labels)
+    labels = np.asarray(ids)[labelled].astype(str)
+    key = chart_key("risk_return", risk, npv, selected, labels, title, threshold)
+
+    def draw(fig):
+        ax = fig.subplots()
+        if n > threshold:
+            cells = ax.hexbin(
+                risk, npv, C=selected.astype(float), reduce_C_function=np.mean,
+                gridsize=60, cmap="RdYlGn", vmin=0, vmax=1, mincnt=1
+            )
+            fig.colorbar(cells, ax=ax, label="Share of projects funded")
+        else:
+            colors = np.where(selected, "green", "red")
+            size = 120 if n <= 200 else 20
+            ax.scatter(risk, npv, c=colors, s=size, alpha=0.8, linewidths=0)
+
+        for pid, x, y in zip(labels, risk[labelled], npv[labelled]):
+            ax.annotate(pid, (x, y), textcoords="offset points", xytext=(6, 6), fontsize=10)
+
+        # Reference lines
+        ax.axhline(np.nanmedian(npv), linestyle="--", alpha=0.4)
+        ax.axvline(np.nanmedian(risk), linestyle="--", alpha=0.4)
+
+        ax.set_xlabel("Risk (Cash-Flow Volatility)")
+        ax.set_ylabel("Return (NPV in ₹ Crore)")
+        ax.set_title(title)
+
+    return cached_png(key, draw, cache=cache)
+
+
+@traced("charts.forecast_png")
+def forecast_png(years, actual, forecast, target, cache=chart_cache):
+    """Actual vs forecast line chart as PNG bytes, cached by the data it shows"""
+    years, actual, forecast = (np.asarray(a, dtype=float) for a in (years, actual, forecast))
+    key = chart_key("forecast", years, actual, forecast, target)
+
+    def draw(fig):
+        ax = fig.subplots()
+        ax.plot(years, actual, label="Actual", marker="o")
+        ax.plot(years, forecast, label="Forecast", marker="o", linestyle="--")
+        ax.set_xlabel("Year")
+        ax.set_ylabel(f"{target} (₹ Cr)")
+        ax.set_title(f"Actual vs Forecasted {target}")
+        ax.legend()
+
+    return cached_png(key, draw, (6.4, 4.8), cache)
+
+
+@traced("charts.frontier_png")
+def frontier_png(budgets, values, budget, cache=chart_cache):
+    """Efficient frontier step chart as PNG bytes, cached by the curve and budget"""
+    budgets, values = np.asarray(budgets, dtype=float), np.asarray(values, dtype=float)
+    key = chart_key("frontier", budgets, values, budget)
+
+    def draw(fig):
+        ax = fig.subplots()
+        ax.step(budgets, values, where="post")
+        ax.axvline(budget, linestyle="--", alpha=0.4)
+        ax.set_xlabel("Capital Budget (₹ Crore)")
+        ax.set_ylabel("Total Portfolio Score")
+        ax.set_title("Efficient Frontier – Portfolio Value vs Budget")
+
+    return cached_png(key, draw, (9, 4), cache)
@@ -1,9 +1,219 @@
-def get_predefined_answers(df):
-    selected = df[df["Decision"].str.contains("Selected")]["Project_ID"].tolist()
-    rejected = df[df["Decision"].str.contains("Rejected")]["Project_ID"].tolist()
+import re
 
-    highest_risk = df.sort_values("Risk", ascending=False).iloc[0]
-    highest_npv = df.sort_values("NPV", ascending=False).iloc[0]
+import numpy as np
+import pandas as pd
+
+from allocation_model import FUNDED
+from instrumentation import traced
+
+# Columns the index ranks on, with the label used in answers
+RANKED = {
+    "NPV": "NPV (₹ Cr)",
+    "IRR": "IRR",
+    "Risk": "Risk",
+    "Payback": "Payback (years)",
+    "Score": "Score",
+    "Investment": "Investment (₹ Cr)",
+}
+
+# The index groups projects as funded or not; every other allocation_model
+# decision (budget or negative score) counts as rejected
+DECISION_GROUPS = ("Rejected", "Selected")
+
+QUESTION = re.compile(
+    r"^\s*(?P<end>top|bottom|highest|lowest)\s*(?P<k>\d+)?\s*(?:projects?\s+)?by\s+"
+    r"(?P<metric>\w+)(?:\s+in\s+(?P<industry>.+?))?"
+    r"(?:\s+(?P<decision>selected|funded|rejected))?\s*\??\s*$",
+    re.IGNORECASE
+)
+
+
+class AnswerIndex:
+    """
+    Summary of an allocation result, built once when allocation finishes.
+
+    Holds the k best and worst rows per ranked metric for the whole
+    portfolio, each industry, each decision and each industry/decision
+    pair, plus counts and sums per industry and decision, so chatbot
+    answers read O(k) rows instead of sorting or scanning the table.
+    Row positions per decision are kept for paginated ID lists.
+    """
+
+    @traced("chatbot_logic.AnswerIndex.build")
+    def __init__(self, df, industry=None, k=50):
+        self.k = k
+        self.ids = df["Project_ID"].to_numpy()
+        self.values = {m: df[m].to_numpy(dtype=float) for m in RANKED if m in df}
+
+        selected = df["Decision"].eq(FUNDED).to_numpy()
+        if industry is None and "Industry" in df:
+            industry = df["Industry"]
+        industry = pd.Categorical(np.full(len(df), "All") if industry is None else industry)
+        self.industries = list(industry.categories)
+        pair = 2 * industry.codes.astype(np.int64) + selected
+
+        # row positions in catalog order per decision and per industry/decision
+        self.rows = _groups(selected.astype(np.int64), lambda d: (None, DECISION_GROUPS[d]))
+        pairs = _groups(pair, lambda p: (self.industries[p // 2], DECISION_GROUPS[p % 2]))
+        self.rows.update(pairs)
+
+        # extremes are found once per industry/decision pair; a wider group's
+        # k extremes are among its pairs' k extremes, so it merges O(k) rows
+        wider = {}
+        for name, decision in pairs:
+            for key in [(None, None), (name, None), (None, decision)]:
+                wider.setdefault(key, []).append((name, decision))
+
+        self.top = {}
+        for metric, values in self.values.items():
+            for key, rows in pairs.items():
+                self.top[metric, key] = _extremes(values, rows, k)
+            for key, parts in wider.items():
+                best = np.concatenate([self.top[metric, p][0] for p in parts])
+                worst = np.concatenate([self.top[metric, p][1] for p in parts])
+                self.top[metric, key] = (_smallest(-values, best, k), _smallest(values, worst, k))
+
+        n = 2 * len(self.industries)
+        totals = {"Projects": np.bincount(pair, minlength=n)}
+        for metric in ("Investment", "NPV"):
+            if metric in self.values:
+                totals[metric] = np.bincount(pair, np.nan_to_num(self.values[metric]), n)
+        self.aggregates = pd.DataFrame(totals, index=pd.MultiIndex.from_product(
+            [self.industries, DECISION_GROUPS], names=["Industry", "Decision"]
+        ))
+
+    def _rows(self, industry, decision):
+        """Row positions for an industry and/or decision (None = any)"""
+        if industry is None and decision is None:
+            return np.arange(len(self.ids))
+        if industry is None or decision is not None:
+            return self.rows.get((industry, decision), np.zeros(0, dtype=np.int64))
+        parts = [self.rows.get((industry, d), np.zeros(0, dtype=np.int64)) for d in DECISION_GROUPS]
+        return np.sort(np.concatenate(parts))
+
+    def metric(self, name):
+        """Ranked column matching name, case-insensitively"""
+        for metric in self.values:
+            if metric.lower() == name.lower():
+                return metric
+        raise ValueError(f"Cannot rank by {name!r}; choose from {', '.join(self.values)}")
+
+    def industry(self, name):
+        """Industry matching name, case-insensitively"""
+        for industry in self.industries:
+            if industry.lower() == name.strip().lower():
+                return industry
+        raise ValueError(f"No projects in industry {name!r}")
+
+    def ranked(self, metric, k=10, industry=None, decision=None, largest=True):
+        """
+        The k projects with the largest (or smallest) metric, as a table of
+        Project_ID and value. Requests beyond the indexed k are ranked on
+        the fly from the matching rows.
+        """
+        if k > self.k:
+            best, worst = _extremes(self.values[metric], self._rows(industry, decision), k)
+        else:
+            empty = (np.zeros(0, dtype=np.int64),) * 2
+            best, worst = self.top.get((metric, (industry, decision)), empty)
+        rows = (best if largest else worst)[:k]
+        return pd.DataFrame({"Project_ID": self.ids[rows], metric: self.values[metric][rows]})
+
+    def count(self, decision=None, industry=None):
+        """Number of projects with a decision and/or in an industry"""
+        table = self.aggregates["Projects"]
+        if industry is not None:
+            table = table.xs(industry, level="Industry")
+        elif decision is not None:
+            table = table.groupby(level="Decision").sum()
+        return int(table.sum() if decision is None else table.loc[decision])
+
+    def page(self, decision, page=0, page_size=50):
+        """One page of the IDs with a decision, in catalog order, and the total count"""
+        rows = self._rows(None, decision)
+        start = page * page_size
+        return self.ids[rows[start:start + page_size]].tolist(), len(rows)
+
+    def ask(self, question):
+        """
+        Answers questions such as "top 10 by NPV in Energy" or
+        "lowest 5 by risk selected"; returns None when not understood.
+        """
+        match = QUESTION.match(question)
+        if not match:
+            return None
+        try:
+            metric = self.metric(match["metric"])
+            industry = self.industry(match["industry"]) if match["industry"] else None
+        except ValueError as exc:
+            return str(exc)
+        decision = match["decision"]
+        if decision:
+            decision = "Rejected" if decision.lower() == "rejected" else "Selected"
+        largest = match["end"].lower() in ("top", "highest")
+
+        table = self.ranked(metric, int(match["k"] or 10), industry, decision, largest)
+        scope = "projects" if len(table) != 1 else "project"
+        if decision:
+            scope = f"{decision.lower()} {scope}"
+        if industry:
+            scope += f" in {industry}"
+        if table.empty:
+            return f"No {scope} to rank."
+        lines = [
+            f"{i}. {pid} – {value:,.2f}"
+            for i, (pid, value) in enumerate(zip(table["Project_ID"], table[metric]), 1)
+        ]
+        title = f"{'Highest' if largest else 'Lowest'} {len(lines)} {scope} by {RANKED[metric]}:"
+        return "\n".join([title, ""] + lines)
+
+
+def _groups(codes, label):
+    """Row positions per code (one stable sort), keyed by label(code)"""
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes))
+    return {
+        label(code): order[start:stop]
+        for code, (start, stop) in enumerate(zip(np.r_[0, bounds[:-1]], bounds))
+        if stop > start
+    }
+
+
+def _extremes(values, rows, k):
+    """
+    Rows holding the k largest and k smallest finite values, each sorted
+    outwards; ties go to the earlier row, as a stable sort would.
+    """
+    rows = rows[np.isfinite(values[rows])]
+    return _smallest(-values, rows, k), _smallest(values, rows, k)
+
+
+def _smallest(values, rows, k):
+    v = values[rows]
+    if len(rows) > k:
+        cut = np.partition(v, k - 1)[k - 1]
+        keep = v < cut
+        ties = np.flatnonzero(v == cut)
+        keep[ties[np.argsort(rows[ties], kind="stable")][:k - keep.sum()]] = True
+        rows, v = rows[keep], v[keep]
+    return rows[np.lexsort((rows, v))]
+
+
+@traced("chatbot_logic.get_predefined_answers")
+def get_predefined_answers(index, page=0, page_size=50):
+    """
+    Answers to the predefined questions from an AnswerIndex (or an
+    allocation table, which is indexed first). Selected and rejected IDs
+    are listed one page at a time.
+    """
+    if isinstance(index, pd.DataFrame):
+        index = AnswerIndex(index)
+
+    selected = _id_page(index, "Selected", page, page_size)
+    rejected = _id_page(index, "Rejected", page, page_size)
+
+    highest_risk = _highest(index, "Risk")
+    highest_npv = _highest(index, "NPV")
 
     return {
         " Which projects were selected for funding?":
@@ -12,7 +222,7 @@ def get_predefined_answers(df):
                 "expected returns, manageable risk, and efficient use of capital. "
                 "They provide better value compared to other options and fit well within "
                 "the available investment budget.\n\n"
-                + (", ".join(selected) if selected else "No projects were selected.")
+                + (selected or "No projects were selected.")
             ),
 
         " Which projects were rejected due to budget constraints?":
@@ -21,21 +231,25 @@ def get_predefined_answers(df):
                 "they delivered lower value for the level of risk involved. With limited "
                 "capital available, priority was given to projects that offer higher returns, "
                 "faster recovery of investment, and more stable cash flows.\n\n"
-                + (", ".join(rejected) if rejected else "No projects were rejected.")
+                + (rejected or "No projects were rejected.")
             ),
 
         " Which project carries the highest risk?":
             (
-                f"{highest_risk['Project_ID']} carries the highest risk because its expected "
+                f"{highest_risk} carries the highest risk because its expected "
                 "cash flows are more uncertain and show higher volatility compared to other "
                 "projects."
+                if highest_risk is not None else
+                "No project has a risk figure to compare, so none can be named the riskiest."
             ),
 
         " Which project creates the highest value (NPV)?":
             (
-                f"{highest_npv['Project_ID']} creates the highest value as it is expected to "
+                f"{highest_npv} creates the highest value as it is expected to "
                 "generate the greatest net benefit over its lifetime, even after accounting "
                 "for the cost of capital."
+                if highest_npv is not None else
+                "No project has an NPV to compare, so none can be named the most valuable."
             ),
 
         " What is the overall capital allocation recommendation?":
@@ -47,3 +261,20 @@ def get_predefined_answers(df):
             )
     }
 
+
+def _highest(index, metric):
+    """Project_ID with the largest finite metric, or None when no project has one"""
+    if metric not in index.values:
+        return None
+    table = index.ranked(metric, 1)
+    return None if table.empty else table["Project_ID"].iloc[0]
+
+
+def _id_page(index, decision, page, page_size):
+    """Comma-separated IDs for one page, with a range note when there are more"""
+    ids, total = index.page(decision, page, page_size)
+    if total <= page_size:
+        return ", ".join(ids)
+    start = page * page_size
+    shown = f"{start + 1:,}–{start + len(ids):,}" if ids else "none"
+    return ", ".join(ids) + f"\n\n*Showing {shown} of {total:,} projects.*"
@@ -0,0 +1,92 @@
+"""
+Headless capital allocation runs.
+
+Example:
+    python cli.py --projects catalog.parquet --scenario Base Worst \
+        --wacc 0.10 0.11 0.12 --budget 100 150 --jobs 4 --output results.csv
+    python cli.py --scenario Base --shock Stagflation 0.9 1.2 --output results.csv
+    python cli.py --panel panel.csv --jobs 0 --forecasts forecasts.csv
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+
+def read_table(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    if path.endswith(".npy"):
+        import numpy as np
+        return pd.DataFrame(np.load(path))
+    return pd.read_csv(path)
+
+
+def write_table(df, path):
+    if path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run capital allocation without the UI.")
+    parser.add_argument("--projects", help="project catalog (.csv, .parquet or .npy), streamed in chunks; defaults to the demo catalog")
+    parser.add_argument("--historical", help="consolidated historical financials (.csv, .parquet or .npy); defaults to the demo data")
+    parser.add_argument("--panel", help="multi-entity historical panel (.csv, .parquet or .npy) for --forecasts")
+    parser.add_argument("--scenario", nargs="+", default=["Base"], choices=["Base", "Best", "Worst"])
+    parser.add_argument("--shock", nargs=3, action="append", default=[],
+                        metavar=("NAME", "REVENUE", "COST"),
+                        help="extra scenario with revenue and cost multipliers, e.g. Stagflation 0.9 1.2")
+    parser.add_argument("--wacc", nargs="+", type=float, default=[0.11])
+    parser.add_argument("--budget", nargs="+", type=float, default=[100])
+    parser.add_argument("--objective", default="Score", choices=["Score", "NPV"])
+    parser.add_argument("--chunk-size", type=int, default=250_000, help="catalog rows read per chunk")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes (0 = all cores)")
+    parser.add_argument("--output", default="allocation_results.csv", help="per-project results (.csv or .parquet)")
+    parser.add_argument("--summary", help="optional per-run summary file (.csv or .parquet)")
+    parser.add_argument("--forecasts", help="optional per-entity forecasts of --panel, else of --historical (.csv or .parquet)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from data_generation import generate_historical_data, generate_project_data
+    from pipeline import forecast_panel, run_grid
+
+    projects = args.projects or generate_project_data()
+    historical = read_table(args.historical) if args.historical else generate_historical_data()
+
+    scenarios = dict.fromkeys(args.scenario)
+    for name, revenue, cost in args.shock:
+        scenarios[name] = (float(revenue), float(cost))
+
+    try:
+        results, summary = run_grid(
+            projects, historical,
+            scenarios=scenarios,
+            waccs=args.wacc,
+            budgets=args.budget,
+            objective=args.objective,
+            n_jobs=args.jobs or os.cpu_count(),
+            chunk_size=args.chunk_size
+        )
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+
+    write_table(results, args.output)
+    if args.summary:
+        write_table(summary, args.summary)
+    if args.forecasts:
+        panel = read_table(args.panel) if args.panel else historical
+        write_table(forecast_panel(panel, n_jobs=args.jobs or os.cpu_count()), args.forecasts)
+
+    print(summary.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
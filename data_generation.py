@@ -1,3 +1,5 @@
+import warnings
+
 import pandas as pd
 import numpy as np
 
@@ -33,3 +35,252 @@ def generate_project_data():
         "Project_Life (Years)": [5, 6, 4, 7, 5, 6],
         "Risk_Factor (0–1)": [0.35, 0.50, 0.25, 0.45, 0.30, 0.55]
     })
+
+
+# ---------------- SYNTHETIC CATALOGS ----------------
+# Industry mix, typical project life and mean risk factor
+INDUSTRIES = {
+    "Energy":        {"share": 0.20, "life": 7, "risk": 0.40},
+    "FinTech":       {"share": 0.15, "life": 5, "risk": 0.50},
+    "Healthcare":    {"share": 0.15, "life": 5, "risk": 0.30},
+    "Manufacturing": {"share": 0.20, "life": 7, "risk": 0.45},
+    "Retail":        {"share": 0.15, "life": 4, "risk": 0.30},
+    "AI":            {"share": 0.15, "life": 5, "risk": 0.55},
+}
+
+PROJECT_COLUMNS = [
+    "Project_ID", "Industry", "Initial_Investment (₹ Cr)",
+    "Project_Life (Years)", "Risk_Factor (0–1)"
+]
+# Catalog rows drawn per random stream (see iter_project_catalog)
+CATALOG_BLOCK = 4096
+# Panel entities drawn per random stream (see iter_historical_panel)
+PANEL_BLOCK = 1024
+
+HISTORICAL_COLUMNS = [
+    "Entity", "Industry", "Year", "Revenue", "Operating_Cost",
+    "Inflation (%)", "Demand_Index"
+]
+
+
+def iter_project_catalog(n_projects, seed=0, chunk_size=1_000_000):
+    """
+    Synthetic project catalog of any size, yielded in DataFrame chunks
+    with the generate_project_data() schema.
+
+    Distributions:
+    - Industry: fixed mix (INDUSTRIES)
+    - Initial Investment: log-normal, median ₹20 Cr, ₹2–500 Cr
+    - Project Life: industry norm ±1 year, 2–15 years
+    - Risk Factor: beta around the industry mean
+
+    Rows are drawn in fixed blocks of CATALOG_BLOCK, each from its own
+    stream of the seed, so row i is the same for any chunk size and any
+    catalog of more than i projects.
+    """
+    names = np.array(list(INDUSTRIES))
+    rows = _block_rows(lambda b: _catalog_block(seed, b), CATALOG_BLOCK)
+
+    for start in range(0, n_projects, chunk_size):
+        stop = min(start + chunk_size, n_projects)
+        industry, investment, life, risk = rows(start, stop)
+
+        yield pd.DataFrame({
+            "Project_ID": np.char.add("P", np.arange(start + 1, stop + 1).astype(str)),
+            "Industry": names[industry],
+            "Initial_Investment (₹ Cr)": investment,
+            "Project_Life (Years)": life,
+            "Risk_Factor (0–1)": risk
+        })
+
+
+def _block_rows(draw, block_size):
+    """
+    rows(start, stop) -> columns of rows start:stop, sliced from the
+    blocks draw(b) returns for rows b * block_size onwards. The last
+    block is kept, since consecutive chunks usually share it.
+    """
+    cached = {}
+
+    def block(b):
+        if b not in cached:
+            cached.clear()
+            cached[b] = draw(b)
+        return cached[b]
+
+    def rows(start, stop):
+        parts = [
+            [column[max(start - b * block_size, 0):stop - b * block_size] for column in block(b)]
+            for b in range(start // block_size, (stop - 1) // block_size + 1)
+        ]
+        return [np.concatenate(column) for column in zip(*parts)]
+
+    return rows
+
+
+def _catalog_block(seed, block):
+    """
+    Industry codes, investments, lives and risk factors of catalog rows
+    block * CATALOG_BLOCK onwards, from the block-th child stream of seed.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block,)))
+    share = np.array([v["share"] for v in INDUSTRIES.values()])
+    life = np.array([v["life"] for v in INDUSTRIES.values()])
+    risk = np.array([v["risk"] for v in INDUSTRIES.values()])
+
+    size = CATALOG_BLOCK
+    industry = rng.choice(len(share), size=size, p=share / share.sum())
+    mean_risk = risk[industry]
+    return (
+        industry,
+        np.clip(np.rint(rng.lognormal(np.log(20), 0.6, size)), 2, 500).astype(np.int64),
+        np.clip(life[industry] + rng.integers(-1, 2, size), 2, 15).astype(np.int64),
+        np.round(rng.beta(20 * mean_risk, 20 * (1 - mean_risk)), 2),
+    )
+
+
+def iter_historical_panel(n_entities, years=range(2018, 2025), seed=0, chunk_size=10_000):
+    """
+    Multi-entity historical panel (one row per entity and year), yielded in
+    chunks of chunk_size entities, with an Entity and Industry column in
+    front of the generate_historical_data() schema.
+
+    Inflation follows one economy-wide path; each entity gets its own
+    demand trend, revenue scale, growth and cost ratio. Entities are drawn
+    in fixed blocks of PANEL_BLOCK, each from its own stream of the seed,
+    so an entity's rows are the same for any chunk size.
+    """
+    years = np.asarray(list(years))
+    rng = np.random.default_rng(seed)
+    names = np.array(list(INDUSTRIES))
+
+    # economy-wide inflation: AR(1) around 5%
+    inflation = np.empty(len(years))
+    level = 4.0
+    for i in range(len(years)):
+        level = 5.0 + 0.6 * (level - 5.0) + rng.normal(0, 0.6)
+        inflation[i] = round(level, 1)
+
+    t = np.arange(len(years))
+    rows = _block_rows(lambda b: _panel_block(seed, b, len(years)), PANEL_BLOCK)
+    for start in range(0, n_entities, chunk_size):
+        size = min(chunk_size, n_entities - start)
+        industry, trend, noise, growth, scale, ratio = rows(start, start + size)
+
+        demand = 95 + trend * t + noise
+        revenue = scale * (1 + growth) ** t * demand / 100
+        cost_ratio = ratio * (1 + (inflation - 5) / 100)
+
+        yield pd.DataFrame({
+            "Entity": np.repeat(np.char.add("E", np.arange(start + 1, start + size + 1).astype(str)), len(years)),
+            "Industry": np.repeat(names[industry], len(years)),
+            "Year": np.tile(years, size),
+            "Revenue": np.round(revenue, 1).ravel(),
+            "Operating_Cost": np.round(revenue * cost_ratio, 1).ravel(),
+            "Inflation (%)": np.tile(inflation, size),
+            "Demand_Index": np.round(demand, 1).ravel()
+        })
+
+
+def _panel_block(seed, block, n_years):
+    """
+    Industry codes, demand trends and noise, growth rates, revenue scales
+    and cost ratios of panel entities block * PANEL_BLOCK onwards, from
+    the block-th child stream of seed.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block,)))
+    share = np.array([v["share"] for v in INDUSTRIES.values()])
+
+    size = PANEL_BLOCK
+    return (
+        rng.choice(len(share), size=size, p=share / share.sum()),
+        rng.normal(2, 0.8, (size, 1)),
+        rng.normal(0, 1, (size, n_years)),
+        rng.normal(0.05, 0.02, (size, 1)),
+        rng.lognormal(np.log(120), 0.8, (size, 1)),
+        rng.uniform(0.5, 0.7, (size, 1)),
+    )
+
+
+def _npy_dtype(chunk, widths=None):
+    """
+    Structured dtype of chunk's columns. Strings are as wide as widths
+    gives for their column, else as the chunk's longest value.
+    """
+    widths = widths or {}
+    fields = []
+    for column in chunk.columns:
+        if chunk[column].dtype.kind in "OUT":
+            width = widths.get(column) or _str_width(chunk[column])
+            fields.append((column, f"U{width}"))
+        else:
+            fields.append((column, chunk[column].dtype.str))
+    return np.dtype(fields)
+
+
+def _str_width(values):
+    return int(np.char.str_len(values.to_numpy().astype(str)).max(initial=1))
+
+
+def write_chunks(chunks, path, n_rows, widths=None):
+    """
+    Streams DataFrame chunks to .parquet, .csv or .npy (structured,
+    memory-mappable) without holding the full dataset in memory.
+
+    A .npy file's string fields are sized from widths ({column: max
+    characters}) or else the first chunk; a longer value in a later chunk
+    raises ValueError rather than being cut off.
+    """
+    writer = out = None
+    offset = 0
+
+    for chunk in chunks:
+        if path.endswith(".parquet"):
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError as exc:
+                raise ImportError("Writing Parquet requires pyarrow (pip install pyarrow)") from exc
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+        elif path.endswith(".npy"):
+            if out is None:
+                with warnings.catch_warnings():
+                    # non-ASCII column names need .npy format 3.0
+                    warnings.simplefilter("ignore", UserWarning)
+                    out = np.lib.format.open_memmap(
+                        path, mode="w+", dtype=_npy_dtype(chunk, widths), shape=(n_rows,)
+                    )
+            block = out[offset:offset + len(chunk)]
+            for column in chunk.columns:
+                field = out.dtype[column]
+                if field.kind == "U" and _str_width(chunk[column]) > field.itemsize // 4:
+                    raise ValueError(
+                        f"Column {column!r} has values longer than the {field.itemsize // 4} "
+                        f"characters of the first chunk; pass widths={{{column!r}: ...}}"
+                    )
+                block[column] = chunk[column].to_numpy()
+        else:
+            chunk.to_csv(path, mode="a" if offset else "w", header=not offset, index=False)
+        offset += len(chunk)
+
+    if writer is not None:
+        writer.close()
+    if out is not None:
+        out.flush()
+    return offset
+
+
+def generate_project_file(path, n_projects, seed=0, chunk_size=1_000_000):
+    """Writes a synthetic project catalog to .parquet, .csv or .npy"""
+    widths = {"Project_ID": 1 + len(str(n_projects)), "Industry": max(map(len, INDUSTRIES))}
+    return write_chunks(iter_project_catalog(n_projects, seed, chunk_size), path, n_projects, widths)
+
+
+def generate_historical_file(path, n_entities, years=range(2018, 2025), seed=0, chunk_size=10_000):
+    """Writes a synthetic multi-entity historical panel to .parquet, .csv or .npy"""
+    n_rows = n_entities * len(years)
+    widths = {"Entity": 1 + len(str(n_entities)), "Industry": max(map(len, INDUSTRIES))}
+    return write_chunks(iter_historical_panel(n_entities, years, seed, chunk_size), path, n_rows, widths)
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+from financial_metrics import cashflow_matrix, evaluate_projects
+from instrumentation import traced
+from scenario_analysis import SCENARIOS, scenario_shocks
+
+# WACC slider range (0.09–0.13) at a finer step than the slider itself
+WACC_GRID = np.round(np.arange(0.09, 0.13 + 1e-9, 0.0025), 4)
+
+
+def discount_matrix(waccs, max_life):
+    """
+    Discount factors, years 1..max_life down the rows, one column per WACC.
+    """
+    years = np.arange(1, max_life + 1)
+    return (1 + np.asarray(waccs, dtype=float)[None, :]) ** -years[:, None].astype(float)
+
+
+@traced("evaluation.evaluate_scenario")
+def evaluate_scenario(projects, base_revenue, base_cost, scenario, waccs=WACC_GRID,
+                      keep_cashflows=True):
+    """
+    Evaluates a project catalog once per scenario.
+
+    IRR, payback and risk do not depend on WACC, so they are computed a
+    single time; NPV is precomputed for every WACC on the grid as one
+    matrix product of the cash-flow matrix with the discount-factor matrix.
+    The cash-flow matrix is kept for WACCs off the grid unless
+    keep_cashflows is False.
+    """
+    investments = projects["Initial_Investment (₹ Cr)"].to_numpy(dtype=float)
+    lives = projects["Project_Life (Years)"].to_numpy(dtype=int)
+    waccs = np.asarray(waccs, dtype=float)
+
+    cf, _ = cashflow_matrix(base_revenue, base_cost, lives, scenario)
+    metrics = evaluate_projects(investments, lives, base_revenue, base_cost, scenario)
+
+    return {
+        "Project_ID": projects["Project_ID"].to_numpy(),
+        "Investment": projects["Initial_Investment (₹ Cr)"].to_numpy(),
+        "IRR": metrics["IRR"],
+        "Payback": metrics["Payback"],
+        "Risk": metrics["Risk"],
+        "cashflows": cf if keep_cashflows else None,
+        "waccs": waccs,
+        "npv_grid": cf @ discount_matrix(waccs, cf.shape[1]) - investments[:, None]
+    }
+
+
+@traced("evaluation.evaluate_scenarios")
+def evaluate_scenarios(projects, base_revenue, base_cost, scenarios=tuple(SCENARIOS),
+                       waccs=WACC_GRID, keep_cashflows=True):
+    """
+    Evaluates a project catalog under several scenarios in one pass.
+
+    scenarios is a list of SCENARIOS names or a dict of name -> (revenue
+    factor, cost factor) shock sets. A scenario only rescales each
+    project's margin, so the unit-margin cash flows and their NPVs over
+    the WACC grid are computed once and every scenario is one
+    projects x WACCs slice of npv_grid (scenarios x projects x WACCs).
+    IRR, payback and risk are evaluated for all scenarios in one batch.
+    Use scenario_slice() for an evaluate_scenario()-style dict.
+    """
+    shocks = scenario_shocks(scenarios)
+    factors = np.array(list(shocks.values()), dtype=float).reshape(-1, 2)
+    investments = projects["Initial_Investment (₹ Cr)"].to_numpy(dtype=float)
+    lives = projects["Project_Life (Years)"].to_numpy(dtype=int)
+    waccs = np.asarray(waccs, dtype=float)
+
+    revenue = np.broadcast_to(np.asarray(base_revenue, dtype=float), lives.shape)
+    cost = np.broadcast_to(np.asarray(base_cost, dtype=float), lives.shape)
+    margins = revenue[None, :] * factors[:, :1] - cost[None, :] * factors[:, 1:]
+
+    unit, _ = cashflow_matrix(1.0, 0.0, lives, "Base")
+    unit_pv = unit @ discount_matrix(waccs, unit.shape[1])
+
+    # scenario-stacked rows: margin is passed as revenue with zero cost
+    metrics = evaluate_projects(
+        np.tile(investments, len(factors)), np.tile(lives, len(factors)),
+        margins.ravel(), 0.0, "Base"
+    )
+
+    return {
+        "scenarios": list(shocks),
+        "shocks": factors,
+        "margins": margins,
+        "Project_ID": projects["Project_ID"].to_numpy(),
+        "Investment": projects["Initial_Investment (₹ Cr)"].to_numpy(),
+        "IRR": metrics["IRR"].reshape(margins.shape),
+        "Payback": metrics["Payback"].reshape(margins.shape),
+        "Risk": metrics["Risk"].reshape(margins.shape),
+        "unit_cashflows": unit if keep_cashflows else None,
+        "waccs": waccs,
+        "npv_grid": margins[:, :, None] * unit_pv[None] - investments[None, :, None]
+    }
+
+
+def scenario_slice(evaluation, scenario):
+    """
+    One scenario of an evaluate_scenarios() result, in the
+    evaluate_scenario() layout that metrics_at() reads. Its cash flows
+    stay factored as the scenario's margins times the shared unit-margin
+    cash flows, which npv_at() discounts for WACCs off the grid.
+    """
+    s = evaluation["scenarios"].index(scenario)
+    return {
+        "Project_ID": evaluation["Project_ID"],
+        "Investment": evaluation["Investment"],
+        "IRR": evaluation["IRR"][s],
+        "Payback": evaluation["Payback"][s],
+        "Risk": evaluation["Risk"][s],
+        "cashflows": None,
+        "margins": evaluation["margins"][s],
+        "unit_cashflows": evaluation["unit_cashflows"],
+        "waccs": evaluation["waccs"],
+        "npv_grid": evaluation["npv_grid"][s]
+    }
+
+
+def npv_at(evaluation, wacc):
+    """
+    NPVs at one WACC: a view of the precomputed grid column, or discounted
+    from the cached cash flows when off the grid.
+    """
+    hit = np.flatnonzero(np.isclose(evaluation["waccs"], wacc))
+    if len(hit):
+        return evaluation["npv_grid"][:, hit[0]]
+    cf = evaluation["cashflows"]
+    if cf is not None:
+        return cf @ discount_matrix([wacc], cf.shape[1])[:, 0] - evaluation["Investment"]
+    unit = evaluation.get("unit_cashflows")
+    if unit is None:
+        raise ValueError(f"WACC {wacc} was not precomputed for this evaluation")
+    unit_pv = unit @ discount_matrix([wacc], unit.shape[1])[:, 0]
+    return evaluation["margins"] * unit_pv - evaluation["Investment"]
+
+
+@traced("evaluation.metrics_at")
+def metrics_at(evaluation, wacc):
+    """
+    Per-project metrics table at one WACC, read from the precomputed grid
+    (or discounted from the cached cash flows when off the grid).
+    """
+    return pd.DataFrame({
+        "Project_ID": evaluation["Project_ID"],
+        "Investment": evaluation["Investment"],
+        "NPV": npv_at(evaluation, wacc),
+        "IRR": evaluation["IRR"],
+        "Payback": evaluation["Payback"],
+        "Risk": evaluation["Risk"]
+    })
@@ -1,5 +1,8 @@
+from functools import lru_cache
+
 import numpy as np
-import numpy_financial as npf
+import pandas as pd
+from instrumentation import count, traced
 from scenario_analysis import apply_scenario
 
 def cashflows(base_revenue, base_cost, years, scenario):
@@ -17,9 +20,11 @@ def cashflows(base_revenue, base_cost, years, scenario):
     ]
 
 def npv(cf, investment, wacc):
+    import numpy_financial as npf
     return npf.npv(wacc, [-investment] + cf)
 
 def irr(cf, investment):
+    import numpy_financial as npf
     return npf.irr([-investment] + cf)
 
 def payback(cf, investment):
@@ -32,3 +37,351 @@ def payback(cf, investment):
 
 def risk(cf):
     return np.std(cf) / np.mean(cf)
+
+
+RATE_GRID = np.union1d(np.expm1(np.linspace(np.log(1e-4), np.log(101.0), 240)), [0.0])
+
+# Geometric flows change sign at most once, so a coarse bracket grid suffices
+GEOMETRIC_RATE_GRID = np.array([-0.9999, -0.9, -0.5, -0.2, 0.0, 0.2, 0.5, 1.0, 3.0, 10.0, 100.0])
+
+
+def _bracket(npv_fn, grid, f_grid, k, has, upward, widen, factor=10.0, limit=1e15):
+    """
+    Brackets (lo, hi, NPV at lo) at grid cells k, NaN where none exists.
+    Rows in widen whose NPV keeps its sign past the end of the grid have
+    the bracket widened geometrically in 1 + rate, by factor per step (up
+    to limit, or down to 1 / limit), so IRRs beyond 10,000% or within
+    0.01% of -100% are still found.
+    """
+    rows = np.arange(len(f_grid))
+    lo = np.where(has, grid[k], np.nan)
+    hi = grid[k + 1].astype(float)
+    f_lo = f_grid[rows, k]
+
+    end = -1 if upward else 0
+    idx = np.flatnonzero(widen & ~has & np.isfinite(f_grid[:, end]) & (f_grid[:, end] != 0))
+    edge, f_edge = np.full(len(idx), grid[end], dtype=float), f_grid[idx, end]
+    scale = factor if upward else 1 / factor
+    while len(idx):
+        nxt = (1 + edge) * scale - 1
+        # discounting overflows near -100%; those rows just stop widening
+        with np.errstate(over="ignore", invalid="ignore"):
+            f_nxt, _ = npv_fn(idx, nxt)
+        found = np.flatnonzero(np.sign(f_nxt) * np.sign(f_edge) <= 0)
+        if upward:
+            lo[idx[found]], hi[idx[found]], f_lo[idx[found]] = edge[found], nxt[found], f_edge[found]
+        else:
+            lo[idx[found]], hi[idx[found]], f_lo[idx[found]] = nxt[found], edge[found], f_nxt[found]
+        keep = np.isfinite(f_nxt) & ((1 + nxt < limit) if upward else (1 + nxt > 1 / limit))
+        keep[found] = False
+        idx, edge, f_edge = idx[keep], nxt[keep], f_nxt[keep]
+    return lo, hi, f_lo
+
+
+def _sign_changes(values):
+    """Sign changes per row, ignoring zeros: by Descartes' rule, the most IRRs a row can have"""
+    signs = np.sign(values)
+    last = np.maximum.accumulate(np.where(signs != 0, np.arange(values.shape[1]), 0), axis=1)
+    signs = np.take_along_axis(signs, last, axis=1)
+    return (signs[:, 1:] * signs[:, :-1] < 0).sum(axis=1)
+
+
+def _solve_irr(npv_fn, f_grid, tol, maxiter, grid=RATE_GRID, roots=None):
+    """
+    Safeguarded Newton IRR iteration shared by the batch solvers.
+
+    npv_fn(idx, rate) returns NPV and its slope for rows idx at one rate
+    per row; f_grid holds every row's NPV on the rate grid. The sign changes
+    nearest to zero on either side are refined, with bisection whenever a
+    Newton step leaves the bracket, and the root closest to zero is kept,
+    as numpy_financial.irr does. roots bounds the number of IRRs per row;
+    only rows with fewer brackets on the grid are searched past its ends.
+    """
+    n = len(f_grid)
+    change = np.sign(f_grid[:, :-1]) * np.sign(f_grid[:, 1:]) <= 0
+    zero = np.searchsorted(grid, 0.0)
+
+    # nearest bracket at or above zero rate, and nearest one below it
+    above = change[:, zero:]
+    k_up = zero + above.argmax(axis=1)
+    below = change[:, :zero][:, ::-1]
+    k_down = zero - 1 - below.argmax(axis=1)
+
+    # a root past either end of the grid is only looked for when it could
+    # be the one closest to zero: above 10,000% only without any root in
+    # the grid, below -99.99% only without a root between -100% and 100%
+    has_up, has_down = above.any(axis=1), below.any(axis=1)
+    missing = np.ones(n, dtype=bool) if roots is None else change.sum(axis=1) < roots
+    up = _bracket(npv_fn, grid, f_grid, k_up, has_up, True, missing & ~has_down)
+    down = _bracket(npv_fn, grid, f_grid, k_down, has_down, False, missing & ~(up[0] < 1.0))
+
+    best = np.full(n, np.nan)
+    converged = np.zeros(n, dtype=bool)
+    for lo, hi, f_lo in (up, down):
+        lo, hi, f_lo = lo.copy(), hi.copy(), f_lo.copy()
+        rate = (lo + hi) / 2
+        ok = np.zeros(n, dtype=bool)
+        active = np.isfinite(rate)
+
+        for _ in range(maxiter):
+            if not active.any():
+                break
+            idx = np.flatnonzero(active)
+            r, a_lo, a_hi, a_flo = rate[idx], lo[idx], hi[idx], f_lo[idx]
+            with np.errstate(over="ignore", invalid="ignore"):
+                f, slope = npv_fn(idx, r)
+
+            same = np.sign(f) == np.sign(a_flo)
+            a_lo, a_hi = np.where(same, r, a_lo), np.where(same, a_hi, r)
+            a_flo = np.where(same, f, a_flo)
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step = r - f / slope
+            outside = ~np.isfinite(step) | (step <= a_lo) | (step >= a_hi)
+            new = np.where(f == 0, r, np.where(outside, (a_lo + a_hi) / 2, step))
+            done = (f == 0) | (np.abs(new - r) <= tol * (1 + np.abs(r)))
+
+            rate[idx], lo[idx], hi[idx], f_lo[idx] = new, a_lo, a_hi, a_flo
+            ok[idx[done]] = True
+            active[idx[done]] = False
+
+        closer = ok & (~converged | (np.abs(rate) < np.abs(best)))
+        best[closer] = rate[closer]
+        converged |= ok
+
+    return best, converged
+
+
+@traced("financial_metrics.irr_batch")
+def irr_batch(values, tol=1e-10, maxiter=100, block=65536):
+    """
+    Vectorized IRR for a matrix of cash-flow rows (time 0 first).
+
+    Rows are bracketed on a rate grid from -99.99% to 10,000%, widened
+    for rows still short of a root at either end, and refined with
+    safeguarded Newton steps, block rows at a time. NaN entries are
+    treated as zero flows.
+
+    Returns the rates (NaN where no root exists or the iteration cap is
+    hit) and a boolean converged flag per row.
+    """
+    values = np.nan_to_num(np.atleast_2d(np.asarray(values, dtype=float)))
+    t = np.arange(values.shape[1])
+    grid_discount = (1 + RATE_GRID[None, :]) ** -t[:, None]
+
+    rates = np.full(len(values), np.nan)
+    converged = np.zeros(len(values), dtype=bool)
+    for start in range(0, len(values), block):
+        rows = values[start:start + block]
+
+        def npv_fn(idx, rate):
+            discount = (1 + rate[:, None]) ** -t
+            f = (rows[idx] * discount).sum(axis=1)
+            slope = -(rows[idx] * t * discount).sum(axis=1) / (1 + rate)
+            return f, slope
+
+        rates[start:start + block], converged[start:start + block] = _solve_irr(
+            npv_fn, rows @ grid_discount, tol, maxiter, roots=_sign_changes(rows)
+        )
+
+    return rates, converged
+
+
+def _geometric_sums(x, life):
+    """
+    sum(x**i) and its derivative sum(i * x**(i - 1)) for i = 1..life.
+    """
+    near_one = np.abs(1 - x) < 1e-8
+    safe = np.where(near_one, 0.5, x)
+    xl = safe ** life
+    total = np.where(near_one, life, safe * (1 - xl) / (1 - safe))
+    slope = np.where(
+        near_one,
+        life * (life + 1) / 2,
+        (1 - (life + 1) * xl + life * xl * safe) / (1 - safe) ** 2
+    )
+    return total, slope
+
+
+def _geometric_risk(margin, growth, life):
+    """
+    Closed-form risk (std / mean) of cf_i = margin * (1 + growth)**i.
+    """
+    q = 1 + growth
+    s1, _ = _geometric_sums(q, life)
+    s2, _ = _geometric_sums(q * q, life)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spread = np.sqrt(np.maximum(life * s2 / (s1 * s1) - 1, 0.0))
+        return np.where(margin == 0, np.nan, np.sign(margin) * spread)
+
+
+def _geometric_kernel(margin, growth, wacc, life):
+    """
+    Closed-form PV of flows and risk for cf_i = margin * (1 + growth)**i.
+    """
+    pv, _ = _geometric_sums((1 + growth) / (1 + wacc), life)
+    return margin * pv, _geometric_risk(margin, growth, life)
+
+
+@lru_cache(maxsize=4096)
+def geometric_metrics(margin, growth, wacc, life):
+    """
+    Memoized closed form for one (margin, growth, wacc, life) combination.
+    Returns the present value of the flows (NPV before investment) and risk.
+    """
+    pv, risk_ = _geometric_kernel(float(margin), float(growth), float(wacc), int(life))
+    return float(pv), float(risk_)
+
+
+def geometric_payback(investments, margin, growth, lives):
+    """
+    First year in which cumulative geometric flows cover the investment.
+    """
+    q = 1 + growth
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if growth == 0:
+            k = np.ceil(investments / margin)
+        else:
+            k = np.ceil(np.log1p(investments * growth / (margin * q)) / np.log(q))
+    k = np.where(np.isfinite(k), np.maximum(k, 1), np.inf)
+
+    def cumulative(years):
+        if growth == 0:
+            return margin * years
+        return margin * q * (q ** years - 1) / growth
+
+    # correct the log rounding against the exact cumulative sum
+    finite = np.isfinite(k)
+    kf = np.where(finite, k, 1)
+    kf = np.where((kf > 1) & (cumulative(kf - 1) >= investments), kf - 1, kf)
+    kf = np.where(cumulative(kf) < investments, kf + 1, kf)
+    k = np.where(finite & (margin > 0), kf, np.inf)
+    return np.where(k <= lives, k, np.inf)
+
+
+@traced("financial_metrics.geometric_irr")
+def geometric_irr(investments, margins, growth, lives, tol=1e-10, maxiter=100, block=65536):
+    """
+    IRR of -investment followed by geometric flows, solved on the closed
+    form so no cash-flow rows are built.
+    """
+    investments = np.asarray(investments, dtype=float)
+    margins = np.asarray(margins, dtype=float)
+    lives = np.asarray(lives, dtype=float)
+    q = 1 + growth
+
+    rates = np.full(len(lives), np.nan)
+    converged = np.zeros(len(lives), dtype=bool)
+    for start in range(0, len(lives), block):
+        inv = investments[start:start + block]
+        margin = margins[start:start + block]
+        life = lives[start:start + block]
+
+        def npv_fn(idx, rate):
+            x = q / (1 + rate)
+            total, slope = _geometric_sums(x, life[idx])
+            f = margin[idx] * total - inv[idx]
+            return f, -margin[idx] * slope * x / (1 + rate)
+
+        total, _ = _geometric_sums(q / (1 + GEOMETRIC_RATE_GRID[None, :]), life[:, None])
+        f_grid = margin[:, None] * total - inv[:, None]
+        # -investment then flows of one sign: at most one IRR
+        roots = (np.sign(-inv) * np.sign(margin) < 0).astype(int)
+        rates[start:start + block], converged[start:start + block] = _solve_irr(
+            npv_fn, f_grid, tol, maxiter, GEOMETRIC_RATE_GRID, roots
+        )
+
+    return rates, converged
+
+
+def cashflow_matrix(base_revenue, base_cost, lives, scenario, growth=0.04):
+    """
+    Padded cash-flow matrix for a batch of projects.
+
+    Row i holds the annual flows of project i for years 1..life_i and
+    zeros beyond its life, so ragged project lives share one matrix.
+    Returns the matrix and the boolean mask of valid years.
+    """
+    lives = np.asarray(lives, dtype=int)
+    revenue, cost = apply_scenario(
+        np.array(base_revenue, dtype=float),
+        np.array(base_cost, dtype=float),
+        scenario
+    )
+    margin = np.broadcast_to(revenue - cost, lives.shape)
+
+    years = np.arange(1, lives.max(initial=0) + 1)
+    mask = years[None, :] <= lives[:, None]
+    cf = margin[:, None] * (1 + growth) ** years[None, :]
+
+    return np.where(mask, cf, 0.0), mask
+
+
+@traced("financial_metrics.evaluate_projects")
+def evaluate_projects(investments, lives, base_revenue, base_cost, scenario, wacc=None,
+                      growth=0.04):
+    """
+    Batch version of npv / irr / payback / risk.
+
+    Takes arrays of investments and project lives (revenue and cost may be
+    scalars or per-project arrays) and returns a dict of NumPy arrays
+    keyed NPV, IRR, Payback and Risk; without a wacc, only the
+    WACC-independent IRR, Payback and Risk. Flows are geometric in the
+    growth rate, so every metric is evaluated in closed form, once per
+    distinct (margin, life) combination, without building cash-flow rows.
+    """
+    investments = np.asarray(investments, dtype=float)
+    lives = np.asarray(lives, dtype=int)
+    count("rows.evaluated", len(lives))
+    revenue, cost = apply_scenario(
+        np.array(base_revenue, dtype=float),
+        np.array(base_cost, dtype=float),
+        scenario
+    )
+    margins = np.broadcast_to(revenue - cost, lives.shape).astype(float)
+
+    # memo table: one closed-form evaluation per distinct (margin, life)
+    codes = pd.DataFrame({"margin": margins, "life": lives}).groupby(
+        ["margin", "life"], sort=False
+    ).ngroup().to_numpy()
+    _, first = np.unique(codes, return_index=True)
+    metrics = {}
+    if wacc is None:
+        risk_ = _geometric_risk(margins[first], growth, lives[first])
+    else:
+        if len(first) <= 1024:
+            pv, risk_ = np.array([
+                geometric_metrics(m, growth, wacc, life)
+                for m, life in zip(margins[first], lives[first])
+            ]).reshape(-1, 2).T
+        else:
+            pv, risk_ = _geometric_kernel(margins[first], growth, wacc, lives[first])
+        metrics["NPV"] = pv[codes] - investments
+
+    metrics.update({
+        "IRR": geometric_irr(investments, margins, growth, lives)[0],
+        "Payback": geometric_payback(investments, margins, growth, lives).astype(float),
+        "Risk": risk_[codes]
+    })
+    return metrics
+
+
+def evaluate_portfolio(projects, base_revenue, base_cost, scenario, wacc):
+    """
+    Evaluates a project catalog (generate_project_data schema)
+    and returns one row of metrics per project.
+    """
+    metrics = evaluate_projects(
+        projects["Initial_Investment (₹ Cr)"].to_numpy(dtype=float),
+        projects["Project_Life (Years)"].to_numpy(dtype=int),
+        base_revenue,
+        base_cost,
+        scenario,
+        wacc
+    )
+
+    return pd.DataFrame({
+        "Project_ID": projects["Project_ID"].to_numpy(),
+        "Investment": projects["Initial_Investment (₹ Cr)"].to_numpy(),
+        **metrics
+    })
@@ -1,24 +1,62 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import sklearn
 from sklearn.linear_model import LinearRegression
 from sklearn.tree import DecisionTreeRegressor
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import TimeSeriesSplit, train_test_split
 from sklearn.metrics import r2_score, mean_absolute_error
 
-def train_and_select_model(df, target):
+from instrumentation import count, traced
+from model_cache import cache_key, default_cache
+
+FEATURES = ["Year", "Inflation (%)", "Demand_Index"]
+
+
+def candidate_models():
+    return {
+        "Linear Regression": LinearRegression(),
+        "Decision Tree": DecisionTreeRegressor(max_depth=3, random_state=42)
+    }
+
+
+def model_config():
+    """
+    Everything besides the data that determines the fitted models.
+    """
+    return {
+        "features": FEATURES,
+        "split": {"test_size": 0.3, "random_state": 42},
+        "models": {name: repr(model) for name, model in candidate_models().items()},
+        "sklearn": sklearn.__version__
+    }
+
+
+@traced("forecasting.train_and_select_model")
+def train_and_select_model(df, target, cache=default_cache):
     """
     Trains interpretable ML models and selects
     the best-performing model based on R² score.
+
+    Fitted models are cached by a hash of the data, target and
+    model configuration; pass cache=None to always retrain.
     """
-    X = df[["Year", "Inflation (%)", "Demand_Index"]]
+    key = cache_key(df, target, model_config()) if cache is not None else None
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    X = df[FEATURES]
     y = df[target]
 
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.3, random_state=42
     )
 
-    models = {
-        "Linear Regression": LinearRegression(),
-        "Decision Tree": DecisionTreeRegressor(max_depth=3, random_state=42)
-    }
+    models = candidate_models()
 
     results = {}
 
@@ -32,4 +70,93 @@ def train_and_select_model(df, target):
         }
 
     best_model_name = max(results, key=lambda x: results[x]["R2"])
-    return best_model_name, results[best_model_name]["model"], results
+    selection = (best_model_name, results[best_model_name]["model"], results)
+
+    if key is not None:
+        cache.put(key, selection)
+    return selection
+
+
+def _fit_series(task):
+    """
+    Rolling-origin evaluation and full-history refit of one model on one series.
+    """
+    entity, target, name, X, y, n_splits, horizon = task
+
+    model = candidate_models()[name]
+    splitter = TimeSeriesSplit(n_splits=n_splits, test_size=horizon)
+    actual, predicted = [], []
+    for train_idx, test_idx in splitter.split(X):
+        model.fit(X[train_idx], y[train_idx])
+        actual.append(y[test_idx])
+        predicted.append(model.predict(X[test_idx]))
+
+    actual = np.concatenate(actual)
+    predicted = np.concatenate(predicted)
+    model.fit(X, y)
+
+    return {
+        "Entity": entity,
+        "Target": target,
+        "Model": name,
+        "R2": r2_score(actual, predicted),
+        "MAE": mean_absolute_error(actual, predicted),
+        "model": model
+    }
+
+
+@traced("forecasting.forecast_batch")
+def forecast_batch(panel, targets=("Revenue", "Operating_Cost"), entity_col="Entity",
+                   n_splits=3, horizon=1, n_jobs=None):
+    """
+    Fits every candidate model for every (entity, target) series.
+
+    Each series is evaluated with rolling-origin (expanding window)
+    cross-validation and the best model by out-of-fold R² (then MAE) is
+    refit on the full history. Tasks are fanned out one per
+    (entity, target, model) across a process pool; n_jobs=1 runs them
+    serially with identical results.
+
+    Returns a tidy table of CV scores, the selected model per series
+    and a dict of fitted models keyed by (entity, target).
+    """
+    if entity_col is None or entity_col not in panel.columns:
+        groups = [("Apex Industries", panel)]
+    else:
+        groups = list(panel.groupby(entity_col, sort=True))
+
+    tasks = []
+    for entity, series in groups:
+        series = series.sort_values("Year")
+        X = series[FEATURES].to_numpy(dtype=float)
+        for target in targets:
+            y = series[target].to_numpy(dtype=float)
+            for name in candidate_models():
+                tasks.append((entity, target, name, X, y, n_splits, horizon))
+
+    count("forecast.tasks", len(tasks))
+    workers = n_jobs or os.cpu_count() or 1
+    if workers == 1 or len(tasks) == 1:
+        rows = [_fit_series(task) for task in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(_fit_series, tasks, chunksize=chunksize))
+
+    models = {(r["Entity"], r["Target"], r["Model"]): r.pop("model") for r in rows}
+    results = pd.DataFrame(rows)
+
+    ranked = results.assign(_neg_r2=-results["R2"].fillna(-np.inf))
+    selected = (
+        ranked.sort_values(["Entity", "Target", "_neg_r2", "MAE"], kind="stable")
+        .groupby(["Entity", "Target"], sort=False)
+        .head(1)
+        .drop(columns="_neg_r2")
+        .reset_index(drop=True)
+    )
+    fitted = {
+        (r.Entity, r.Target): models[(r.Entity, r.Target, r.Model)]
+        for r in selected.itertuples()
+    }
+
+    return results, selected, fitted
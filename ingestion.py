@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from evaluation import evaluate_scenarios, scenario_slice
+from instrumentation import count, traced
+
+PROJECT_SCHEMA = {
+    "Project_ID": str,
+    "Industry": str,
+    "Initial_Investment (₹ Cr)": float,
+    "Project_Life (Years)": int,
+    "Risk_Factor (0–1)": float,
+}
+
+
+def validate_projects(chunk):
+    """
+    Checks a chunk of project rows against PROJECT_SCHEMA and casts its columns.
+
+    Raises ValueError for missing columns, missing values, non-positive
+    investments or lives, and risk factors outside 0–1.
+    """
+    missing = [c for c in PROJECT_SCHEMA if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Project catalog is missing columns: {missing}")
+
+    chunk = chunk[list(PROJECT_SCHEMA)]
+    if chunk.isna().any().any():
+        bad = chunk.columns[chunk.isna().any()].tolist()
+        raise ValueError(f"Project catalog has missing values in {bad}")
+
+    try:
+        chunk = chunk.astype(PROJECT_SCHEMA)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Project catalog has non-numeric values: {exc}") from exc
+
+    if (chunk["Initial_Investment (₹ Cr)"] <= 0).any():
+        raise ValueError("Initial_Investment (₹ Cr) must be positive")
+    if (chunk["Project_Life (Years)"] < 1).any():
+        raise ValueError("Project_Life (Years) must be at least 1")
+    if not chunk["Risk_Factor (0–1)"].between(0, 1).all():
+        raise ValueError("Risk_Factor (0–1) must lie between 0 and 1")
+
+    return chunk
+
+
+def iter_project_chunks(path, chunk_size=250_000):
+    """
+    Reads a project catalog from .csv, .parquet or .npy (memory-mapped)
+    in validated chunks of at most chunk_size rows.
+    """
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("Reading Parquet requires pyarrow (pip install pyarrow)") from exc
+        batches = pq.ParquetFile(path).iter_batches(
+            batch_size=chunk_size, columns=list(PROJECT_SCHEMA)
+        )
+        chunks = (batch.to_pandas() for batch in batches)
+    elif path.endswith(".npy"):
+        rows = np.load(path, mmap_mode="r")
+        chunks = (
+            pd.DataFrame(np.asarray(rows[start:start + chunk_size]))
+            for start in range(0, len(rows), chunk_size)
+        )
+    else:
+        chunks = pd.read_csv(path, chunksize=chunk_size)
+
+    for chunk in chunks:
+        count("rows.ingested", len(chunk))
+        yield validate_projects(chunk)
+
+
+@traced("ingestion.evaluate_catalog")
+def evaluate_catalog(path, base_revenue, base_cost, scenarios, waccs, chunk_size=250_000):
+    """
+    Streams a catalog file through metric evaluation chunk by chunk.
+
+    Each chunk is evaluated for every scenario in one evaluate_scenarios()
+    pass as soon as it is read, and only the compact per-project columns
+    are kept: ID, industry, investment, IRR, payback, risk and the NPV for
+    each requested WACC.
+    Peak memory therefore depends on chunk_size rather than catalog size.
+    Returns an evaluate_scenario()-style dict per scenario for metrics_at().
+    """
+    parts = {scenario: [] for scenario in scenarios}
+    ids, industries = [], []
+    for chunk in iter_project_chunks(path, chunk_size):
+        ids.append(chunk["Project_ID"].to_numpy().astype("U"))
+        industries.append(pd.Categorical(chunk["Industry"]))
+        evaluations = evaluate_scenarios(
+            chunk, base_revenue, base_cost, scenarios, waccs, keep_cashflows=False
+        )
+        for scenario in parts:
+            evaluation = scenario_slice(evaluations, scenario)
+            parts[scenario].append({
+                key: evaluation[key]
+                for key in ("Investment", "IRR", "Payback", "Risk", "npv_grid")
+            })
+        del chunk, evaluations
+
+    if not ids:
+        raise ValueError(f"Project catalog {path} is empty")
+
+    project_id = np.concatenate(ids)
+    industry = union_categoricals(industries)
+    del ids, industries
+
+    evaluations = {}
+    for scenario in list(parts):
+        chunks = parts.pop(scenario)
+        evaluation = {"Project_ID": project_id, "Industry": industry}
+        for key in ("Investment", "IRR", "Payback", "Risk", "npv_grid"):
+            evaluation[key] = np.concatenate([c.pop(key) for c in chunks])
+        evaluation.update(waccs=np.asarray(waccs, dtype=float), cashflows=None)
+        evaluations[scenario] = evaluation
+    return evaluations
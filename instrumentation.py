@@ -0,0 +1,180 @@
+"""
+Lightweight tracing spans and counters for the pipeline and the app.
+
+Instrumentation is off by default; span() then returns a shared no-op
+context manager and count() returns immediately, so the hooks left in
+the hot paths cost one flag check. What is recorded goes to the current
+Recorder, so concurrent sessions each see only their own spans.
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+_origin = time.perf_counter()
+
+
+class Recorder:
+    """
+    Spans and counters of one consumer: a Streamlit session, a CLI run, a
+    benchmark. Threads record into whichever recorder is current in their
+    context (see use()); without one, the process-wide default.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = bool(enabled)
+        self.lock = threading.Lock()
+        self.spans = []
+        self.counters = defaultdict(int)
+
+
+_default = Recorder()
+_current = contextvars.ContextVar("instrumentation_recorder", default=_default)
+
+
+def use(recorder):
+    """Makes recorder current in this context (thread or task) and returns it."""
+    _current.set(recorder)
+    return recorder
+
+
+def current():
+    return _current.get()
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, recorder, name, attrs):
+        self.recorder = recorder
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        with self.recorder.lock:
+            self.recorder.spans.append({
+                "name": self.name,
+                "start": self.start - _origin,
+                "duration": end - self.start,
+                "thread": threading.get_ident(),
+                "attrs": self.attrs
+            })
+        return False
+
+
+def enable(flag=True):
+    _current.get().enabled = bool(flag)
+
+
+def is_enabled():
+    return _current.get().enabled
+
+
+def reset():
+    recorder = _current.get()
+    with recorder.lock:
+        recorder.spans.clear()
+        recorder.counters.clear()
+
+
+def span(name, **attrs):
+    """Times the enclosed block as a named span when instrumentation is on."""
+    recorder = _current.get()
+    if not recorder.enabled:
+        return _NULL_SPAN
+    return _Span(recorder, name, attrs)
+
+
+def count(name, n=1):
+    """Adds n to a named counter (rows processed, cache hits, ...)."""
+    recorder = _current.get()
+    if recorder.enabled:
+        with recorder.lock:
+            recorder.counters[name] += n
+
+
+def traced(name):
+    """Decorator that wraps every call of a function in a span."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            recorder = _current.get()
+            if not recorder.enabled:
+                return fn(*args, **kwargs)
+            with _Span(recorder, name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _snapshot():
+    recorder = _current.get()
+    with recorder.lock:
+        return list(recorder.spans), dict(recorder.counters)
+
+
+def summary():
+    """Calls, total and mean milliseconds per span name, slowest first."""
+    spans, _ = _snapshot()
+    if not spans:
+        return pd.DataFrame(columns=["Span", "Calls", "Total (ms)", "Mean (ms)"])
+
+    df = pd.DataFrame(spans)
+    table = df.groupby("name", sort=False)["duration"].agg(["count", "sum", "mean"])
+    table = table.sort_values("sum", ascending=False).reset_index()
+    table.columns = ["Span", "Calls", "Total (ms)", "Mean (ms)"]
+    table[["Total (ms)", "Mean (ms)"]] = (table[["Total (ms)", "Mean (ms)"]] * 1000).round(3)
+    return table
+
+
+def counters():
+    return _snapshot()[1]
+
+
+def export_json():
+    """Spans (seconds since process start) and counters as a JSON document."""
+    spans, counts = _snapshot()
+    return json.dumps({"spans": spans, "counters": counts}, indent=2, default=str)
+
+
+def export_chrome_trace():
+    """Spans and counters in Chrome trace-event format (chrome://tracing, Perfetto)."""
+    pid = os.getpid()
+    spans, counts = _snapshot()
+    events = [
+        {
+            "name": s["name"],
+            "ph": "X",
+            "ts": s["start"] * 1e6,
+            "dur": s["duration"] * 1e6,
+            "pid": pid,
+            "tid": s["thread"],
+            "args": s["attrs"]
+        }
+        for s in spans
+    ]
+    end = max((e["ts"] + e["dur"] for e in events), default=0.0)
+    events += [
+        {"name": name, "ph": "C", "ts": end, "pid": pid, "args": {name: value}}
+        for name, value in counts.items()
+    ]
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str)
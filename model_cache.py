@@ -0,0 +1,34 @@
+import hashlib
+import os
+
+import pandas as pd
+
+from cache import LRUCache
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".model_cache")
+
+
+def cache_key(df, target, config):
+    """
+    Content hash of the training data, the target and the model configuration.
+    """
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    h.update(repr(list(df.columns)).encode())
+    h.update(repr(target).encode())
+    h.update(repr(config).encode())
+    return h.hexdigest()
+
+
+class ModelCache(LRUCache):
+    """
+    LRUCache of fitted forecasting models and their scores, kept on disk
+    under CACHE_DIR by default.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_items=32,
+                 max_disk_bytes=256 * 2 ** 20, max_age=7 * 24 * 3600):
+        super().__init__(directory, max_items, max_disk_bytes, max_age, name="model_cache")
+
+
+default_cache = ModelCache()
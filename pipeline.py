@@ -0,0 +1,229 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from forecasting import FEATURES, forecast_batch, train_and_select_model
+from evaluation import evaluate_scenario, evaluate_scenarios, scenario_slice
+from ingestion import evaluate_catalog
+from allocation_model import FUNDED, ProjectStore
+from results_store import inputs_digest, run_key
+from instrumentation import traced
+
+
+@traced("pipeline.forecast_inputs")
+def forecast_inputs(historical):
+    """
+    Next-year revenue and operating cost from the selected forecasting
+    models, evaluated at the latest year's economic indicators.
+
+    historical is one company's consolidated history. A multi-entity
+    panel is rejected: pooled entities would be fitted as one series and
+    forecast from whichever entity's row comes last.
+    """
+    if "Entity" in historical.columns:
+        raise ValueError(
+            "historical data has an Entity column (a multi-entity panel); pass one "
+            "entity's rows or the consolidated history, e.g. "
+            "panel.groupby('Year', as_index=False)[['Revenue', 'Operating_Cost']].sum() "
+            "with the year's indicators, and use forecast_panel() for per-entity forecasts"
+        )
+    _, rev_model, _ = train_and_select_model(historical, "Revenue")
+    _, cost_model, _ = train_and_select_model(historical, "Operating_Cost")
+
+    latest_inputs = historical[FEATURES].iloc[[-1]]
+    return rev_model.predict(latest_inputs)[0], cost_model.predict(latest_inputs)[0]
+
+
+@traced("pipeline.forecast_panel")
+def forecast_panel(historical, targets=("Revenue", "Operating_Cost"), n_jobs=None):
+    """
+    Next-year forecasts for every entity of an iter_historical_panel()
+    style panel, or for the one company without an Entity column. Each
+    series gets the model forecast_batch() selects for it by rolling-origin
+    cross-validation, evaluated at that entity's latest economic indicators.
+
+    Returns one row per entity and target: the selected model, its CV R²
+    and MAE, and the forecast.
+    """
+    _, selected, fitted = forecast_batch(historical, targets, n_jobs=n_jobs)
+    latest = historical.sort_values("Year", kind="stable")
+    if "Entity" in latest:
+        latest = latest.groupby("Entity").tail(1).set_index("Entity")
+    else:
+        latest = latest.tail(1).set_index(pd.Index(["Apex Industries"], name="Entity"))
+    inputs = latest[FEATURES].to_numpy(dtype=float)
+    rows = latest.index.get_indexer(selected["Entity"])
+
+    selected["Forecast"] = [
+        fitted[(entity, target)].predict(inputs[[row]])[0]
+        for entity, target, row in zip(selected["Entity"], selected["Target"], rows)
+    ]
+    return selected
+
+
+def allocate_evaluation(evaluation, wacc, budget, objective="Score", time_limit=10):
+    """
+    Scores and allocates one precomputed scenario evaluation at a WACC and budget.
+    Runs on a ProjectStore, so the returned table is a compact view of it.
+    """
+    store = ProjectStore.from_evaluation(evaluation, wacc).score()
+    spent = store.allocate(budget=budget, objective=objective, time_limit=time_limit)
+    return store.frame(), spent
+
+
+@traced("pipeline.run_allocation")
+def run_allocation(projects, historical, scenario="Base", wacc=0.11, budget=100,
+                   objective="Score", store=None, time_limit=10):
+    """
+    Forecast → cash flows → metrics → scoring → allocation, without any UI.
+    Returns the per-project results table and the capital spent.
+
+    With a ResultsStore, runs are keyed by a hash of the catalog,
+    historical data and parameters; a repeat run is a memory-mapped load
+    of the stored result and skips forecasting entirely.
+    """
+    if store is not None:
+        key = run_key(inputs_digest(projects, historical), scenario, wacc, budget, objective)
+        stored = store.get(key)
+        if stored is not None:
+            return stored
+
+    revenue, cost = forecast_inputs(historical)
+    evaluation = evaluate_scenario(projects, revenue, cost, scenario)
+    df, spent = allocate_evaluation(evaluation, wacc, budget, objective, time_limit)
+    if store is not None:
+        store.put(key, df, spent, scenario=scenario, wacc=wacc, budget=budget, objective=objective)
+    return df, spent
+
+
+def scenario_comparison(evaluation, wacc, budget, objective="Score"):
+    """
+    Side-by-side allocation of every scenario in an evaluate_scenarios()
+    result at one WACC and budget.
+
+    Returns a per-project table with each scenario's NPV and decision, the
+    NPV change against the first scenario and a Changed flag for projects
+    whose decision differs between scenarios, plus a per-scenario summary.
+    """
+    names = evaluation["scenarios"]
+    table = pd.DataFrame({
+        "Project_ID": evaluation["Project_ID"],
+        "Investment": evaluation["Investment"]
+    })
+    summary = []
+    for name in names:
+        df, spent = allocate_evaluation(scenario_slice(evaluation, name), wacc, budget, objective)
+        df = df.set_index("Project_ID").loc[table["Project_ID"]]
+        table[f"NPV ({name})"] = df["NPV"].to_numpy()
+        table[f"Decision ({name})"] = df["Decision"].to_numpy()
+        funded = df["Decision"] == FUNDED
+        summary.append({
+            "Scenario": name,
+            "Spent": spent,
+            "Funded": int(funded.sum()),
+            "Total NPV": float(df["NPV"][funded].sum()),
+            "Value": df.attrs["allocation"]["value"]
+        })
+
+    reference = names[0]
+    for name in names[1:]:
+        table[f"NPV Δ ({name} vs {reference})"] = table[f"NPV ({name})"] - table[f"NPV ({reference})"]
+    decisions = table[[f"Decision ({name})" for name in names]]
+    table["Changed"] = decisions.ne(decisions.iloc[:, 0], axis=0).any(axis=1)
+
+    summary = pd.DataFrame(summary)
+    summary["Total NPV Δ"] = summary["Total NPV"] - summary["Total NPV"].iloc[0]
+    return table, summary
+
+
+@traced("pipeline.compare_scenarios")
+def compare_scenarios(projects, historical, scenarios=("Base", "Best", "Worst"), wacc=0.11,
+                      budget=100, objective="Score"):
+    """
+    Every scenario side by side without any UI: forecasts are fitted once,
+    all scenarios are evaluated in one evaluate_scenarios() pass and each
+    is allocated at the same WACC and budget. scenarios may mix SCENARIOS
+    names with user-defined {name: (revenue factor, cost factor)} shocks.
+    Returns the scenario_comparison() table and summary.
+    """
+    revenue, cost = forecast_inputs(historical)
+    evaluation = evaluate_scenarios(
+        projects, revenue, cost, scenarios, [wacc], keep_cashflows=False
+    )
+    return scenario_comparison(evaluation, wacc, budget, objective)
+
+
+# Per-process state for run_grid workers
+_worker = {}
+
+
+def _init_worker(evaluations, objective):
+    _worker.update(evaluations=evaluations, objective=objective)
+
+
+def _run_combination(combination):
+    scenario, wacc, budget = combination
+    df, spent = allocate_evaluation(
+        _worker["evaluations"][scenario], wacc, budget, _worker["objective"]
+    )
+    df.insert(0, "Budget", budget)
+    df.insert(0, "WACC", wacc)
+    df.insert(0, "Scenario", scenario)
+    return df, spent
+
+
+@traced("pipeline.run_grid")
+def run_grid(projects, historical, scenarios=("Base",), waccs=(0.11,), budgets=(100,),
+             objective="Score", n_jobs=1, chunk_size=250_000):
+    """
+    Runs every scenario x WACC x budget combination.
+
+    projects is a catalog DataFrame or the path of a .csv / .parquet /
+    .npy catalog, which is streamed in chunks of chunk_size rows.
+    scenarios may mix SCENARIOS names with user-defined
+    {name: (revenue factor, cost factor)} shocks.
+    Forecasts are fitted once and all scenarios are evaluated in one pass
+    (with NPVs for all requested WACCs); scoring and allocation runs are then fanned
+    out over worker processes.
+
+    Returns the long results table (one row per project and run) and a
+    summary with capital spent and objective value per run.
+    """
+    revenue, cost = forecast_inputs(historical)
+    combinations = list(itertools.product(scenarios, waccs, budgets))
+
+    if isinstance(projects, str):
+        evaluations = evaluate_catalog(projects, revenue, cost, scenarios, waccs, chunk_size)
+    else:
+        stacked = evaluate_scenarios(
+            projects, revenue, cost, scenarios, waccs, keep_cashflows=False
+        )
+        evaluations = {scenario: scenario_slice(stacked, scenario) for scenario in scenarios}
+    init_args = (evaluations, objective)
+
+    workers = min(n_jobs or os.cpu_count() or 1, len(combinations))
+    if workers <= 1:
+        _init_worker(*init_args)
+        runs = [_run_combination(c) for c in combinations]
+    else:
+        chunksize = max(1, len(combinations) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=init_args) as pool:
+            runs = list(pool.map(_run_combination, combinations, chunksize=chunksize))
+    results = pd.concat([df for df, _ in runs], ignore_index=True)
+    summary = pd.DataFrame([
+        {
+            "Scenario": scenario,
+            "WACC": wacc,
+            "Budget": budget,
+            "Spent": spent,
+            "Funded": int((df["Decision"] == FUNDED).sum()),
+            "Value": df.attrs["allocation"]["value"],
+            "Gap": df.attrs["allocation"]["gap"]
+        }
+        for (scenario, wacc, budget), (df, spent) in zip(combinations, runs)
+    ])
+
+    return results, summary
@@ -0,0 +1,225 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation import traced
+
+MACRO_FACTORS = ("Inflation (%)", "Demand_Index")
+
+
+def _shrink(cov, shrinkage):
+    """Pull a sample covariance towards its diagonal so short histories stay well conditioned"""
+    return (1 - shrinkage) * cov + shrinkage * np.diag(np.diag(cov))
+
+
+class FactorModel:
+    """
+    Industry + macro factor model of annual project value changes.
+
+    Each industry's margin growth is regressed on macro factor changes;
+    the slopes are that industry's macro betas and the residual is its
+    industry factor. `exposures` has one row per industry over the
+    factors (macro first, then one column per industry), `covariance` is
+    the factor covariance and `idiosyncratic` the per-industry variance of
+    entity growth around its industry.
+    """
+
+    def __init__(self, industries, factors, exposures, covariance, idiosyncratic):
+        self.industries = list(industries)
+        self.factors = list(factors)
+        self.exposures = np.asarray(exposures, dtype=float)
+        self.covariance = np.asarray(covariance, dtype=float)
+        self.idiosyncratic = np.asarray(idiosyncratic, dtype=float)
+
+        # exposures in Cholesky coordinates: x' B F B' x = |L' B' x|^2
+        jitter = 1e-12 * max(np.trace(self.covariance), 1.0)
+        chol = np.linalg.cholesky(self.covariance + jitter * np.eye(len(self.factors)))
+        self.loadings = self.exposures @ chol
+
+    def correlation(self):
+        """Implied correlation between two projects' growth in each pair of industries"""
+        cov = self.exposures @ self.covariance @ self.exposures.T
+        sd = np.sqrt(np.diag(cov) + self.idiosyncratic)
+        return pd.DataFrame(cov / np.outer(sd, sd), index=self.industries, columns=self.industries)
+
+
+@traced("portfolio_risk.estimate_factor_model")
+def estimate_factor_model(panel, macro=MACRO_FACTORS, shrinkage=0.5):
+    """
+    Estimates a FactorModel from an iter_historical_panel() style panel
+    (Entity, Industry, Year, Revenue, Operating_Cost and macro columns).
+
+    Growth is year-on-year: margin (Revenue - Operating_Cost) growth per
+    industry and entity, percentage points / 100 for Inflation (%) and
+    relative change for index-type macro columns.
+    """
+    panel = panel.assign(Margin=panel["Revenue"] - panel["Operating_Cost"])
+    years = np.sort(panel["Year"].unique())
+    if len(years) < len(macro) + 3:
+        raise ValueError(
+            f"Need at least {len(macro) + 3} years of history for {len(macro)} macro factors"
+        )
+
+    by_year = panel.groupby("Year")[list(macro)].mean().loc[years]
+    changes = np.array(by_year.diff().iloc[1:], dtype=float)
+    for j, name in enumerate(macro):
+        changes[:, j] = changes[:, j] / 100 if "%" in name else changes[:, j] / by_year[name].to_numpy()[:-1]
+
+    margin = panel.pivot_table(index="Year", columns="Industry", values="Margin", aggfunc="sum").loc[years]
+    industries = list(margin.columns)
+    growth = margin.pct_change().iloc[1:].to_numpy()
+
+    X = np.column_stack([np.ones(len(changes)), changes])
+    coef, *_ = np.linalg.lstsq(X, growth, rcond=None)
+    residual = growth - X @ coef
+
+    m = len(macro)
+    covariance = np.zeros((m + len(industries),) * 2)
+    covariance[:m, :m] = _shrink(np.atleast_2d(np.cov(changes, rowvar=False)), shrinkage)
+    covariance[m:, m:] = _shrink(np.atleast_2d(np.cov(residual, rowvar=False)), shrinkage)
+
+    exposures = np.hstack([coef[1:].T, np.eye(len(industries))])
+
+    panel = panel.sort_values(["Entity", "Year"])
+    entity_growth = panel.groupby("Entity", sort=False)["Margin"].pct_change()
+    industry_growth = margin.pct_change().stack()
+    spread = entity_growth.to_numpy() - industry_growth.reindex(
+        pd.MultiIndex.from_arrays([panel["Year"], panel["Industry"]])
+    ).to_numpy()
+    idiosyncratic = (
+        pd.Series(spread).groupby(panel["Industry"].to_numpy()).var()
+        .reindex(industries).fillna(0.0).to_numpy()
+    )
+
+    return FactorModel(
+        industries, list(macro) + industries, exposures, covariance, idiosyncratic
+    )
+
+
+class PortfolioRisk:
+    """
+    Portfolio volatility (₹ Cr per year) of any subset of a catalog.
+
+    A project's exposure is its industry's factor exposures scaled by its
+    investment, so the catalog is stored as industry codes and scales:
+    memory is O(n) and every evaluation is O(n + industries x factors),
+    never O(n^2). Idiosyncratic risk scales with each project's risk factor
+    relative to the average of its industry in the catalog.
+    """
+
+    def __init__(self, model, industry, investment, risk_factor=None):
+        industry = pd.Categorical(industry, categories=model.industries)
+        if (industry.codes < 0).any():
+            unknown = sorted(set(pd.Series(industry.astype(object))[industry.codes < 0].dropna()))
+            raise ValueError(f"Industries missing from the factor model: {unknown}")
+        self.model = model
+        self.codes = industry.codes.astype(np.int64)
+        self.scale = np.asarray(investment, dtype=float)
+
+        relative = np.ones(len(self.codes))
+        if risk_factor is not None:
+            risk_factor = np.asarray(risk_factor, dtype=float)
+            k = len(model.industries)
+            mean = np.bincount(self.codes, risk_factor, k) / np.maximum(np.bincount(self.codes, minlength=k), 1)
+            relative = np.divide(risk_factor, mean[self.codes], out=np.ones_like(risk_factor),
+                                 where=mean[self.codes] > 0)
+        self.idiosyncratic = (self.scale * relative) ** 2 * model.idiosyncratic[self.codes]
+
+    @classmethod
+    def from_projects(cls, model, projects):
+        """Built from a generate_project_data() style catalog"""
+        return cls(
+            model,
+            projects["Industry"].to_numpy(),
+            projects["Initial_Investment (₹ Cr)"].to_numpy(dtype=float),
+            projects["Risk_Factor (0–1)"].to_numpy(dtype=float),
+        )
+
+    def _factor_position(self, x):
+        """L' B' x: the portfolio's exposure in Cholesky factor coordinates"""
+        by_industry = np.bincount(self.codes, self.scale * x, len(self.model.industries))
+        return self.model.loadings.T @ by_industry
+
+    def variance(self, selected):
+        x = np.asarray(selected, dtype=float)
+        y = self._factor_position(x)
+        return float(y @ y + self.idiosyncratic @ (x * x))
+
+    def volatility(self, selected):
+        return np.sqrt(self.variance(selected))
+
+    def marginal(self, selected):
+        """
+        d(volatility)/d(x_i) for every project at the given portfolio; for an
+        empty portfolio, each project's standalone volatility.
+        """
+        x = np.asarray(selected, dtype=float)
+        y = self._factor_position(x)
+        sigma = np.sqrt(y @ y + self.idiosyncratic @ (x * x))
+        if sigma == 0:
+            standalone = (self.model.loadings ** 2).sum(axis=1)[self.codes] * self.scale ** 2
+            return np.sqrt(standalone + self.idiosyncratic)
+        return (self.scale * (self.model.loadings @ y)[self.codes] + self.idiosyncratic * x) / sigma
+
+    def contributions(self, selected):
+        """Euler risk contributions x_i * marginal_i; they sum to the volatility"""
+        x = np.asarray(selected, dtype=float)
+        return x * self.marginal(x)
+
+    def trim(self, selected, cap, priority):
+        """
+        Drops selected projects, highest priority first, until the
+        volatility is within cap. Each drop updates the factor position
+        in O(factors).
+        """
+        x = np.asarray(selected, dtype=bool).copy()
+        y = self._factor_position(x.astype(float))
+        idio = self.idiosyncratic @ x
+        drop = np.flatnonzero(x)
+        drop = drop[np.argsort(-priority[drop], kind="stable")]
+        for i in drop:
+            if y @ y + idio <= cap * cap:
+                break
+            y -= self.scale[i] * self.model.loadings[self.codes[i]]
+            idio -= self.idiosyncratic[i]
+            x[i] = False
+        return x
+
+    def fill(self, selected, order, cap, weights, capacity):
+        """
+        Adds unselected projects in the given order, skipping any that
+        would take the volatility above cap or the total weight above
+        capacity.
+        """
+        x = np.asarray(selected, dtype=bool).copy()
+        y = self._factor_position(x.astype(float))
+        idio = self.idiosyncratic @ x
+        room = capacity - weights[x].sum()
+
+        # projects that would already break a limit are filtered out in
+        # vectorized passes, so the exact loop only visits plausible additions
+        order = np.asarray(order)
+        order = order[~x[order]]
+        loadings = self.model.loadings
+        step_sq = (loadings ** 2).sum(axis=1)
+        while len(order):
+            codes, scale = self.codes[order], self.scale[order]
+            added = (2 * scale * (loadings @ y)[codes] + scale ** 2 * step_sq[codes]
+                     + self.idiosyncratic[order])
+            order = order[(added <= cap * cap - y @ y - idio) & (weights[order] <= room)]
+            block, order = order[:256], order[256:]
+            for i in block:
+                if weights[i] > room:
+                    continue
+                step = self.scale[i] * loadings[self.codes[i]]
+                if (y + step) @ (y + step) + idio + self.idiosyncratic[i] <= cap * cap:
+                    y += step
+                    idio += self.idiosyncratic[i]
+                    room -= weights[i]
+                    x[i] = True
+        return x
+
+    def factor_exposure(self, selected):
+        """₹ Cr exposure of the portfolio to each factor (B' x)"""
+        x = np.asarray(selected, dtype=float)
+        by_industry = np.bincount(self.codes, self.scale * x, len(self.model.industries))
+        return pd.Series(self.model.exposures.T @ by_industry, index=self.model.factors)
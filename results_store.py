@@ -0,0 +1,290 @@
+import errno
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import count, traced
+
+# Set RESULTS_STORE_DIR to keep runs outside the source tree
+STORE_DIR = os.environ.get(
+    "RESULTS_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".results_store")
+)
+
+# Column headings for run parameters in ResultsStore.list()
+PARAM_LABELS = {"scenario": "Scenario", "wacc": "WACC", "budget": "Budget", "objective": "Objective"}
+
+
+def data_digest(data):
+    """
+    Content hash of a DataFrame, or of a file's bytes when given a path.
+    """
+    h = hashlib.sha256()
+    if isinstance(data, str):
+        with open(data, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    else:
+        h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        h.update(repr(list(data.columns)).encode())
+    return h.hexdigest()
+
+
+def inputs_digest(projects, historical):
+    """Hash of a run's catalog and historical data; compute once per grid"""
+    return hashlib.sha256(
+        (data_digest(projects) + data_digest(historical)).encode()
+    ).hexdigest()
+
+
+def run_key(inputs, scenario, wacc, budget, objective="Score", **options):
+    """
+    Key of one allocation run: the inputs_digest() and every parameter
+    that changes the result (scenario name or shock factors, WACC,
+    budget, objective and any options such as a risk budget).
+    """
+    params = dict(options, scenario=scenario, wacc=float(wacc), budget=float(budget),
+                  objective=objective)
+    return hashlib.sha256(
+        (inputs + json.dumps(params, sort_keys=True, default=repr)).encode()
+    ).hexdigest()[:32]
+
+
+def _plain(value):
+    """JSON-safe copy of solver details (NumPy scalars become Python ones)"""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class ResultsStore:
+    """
+    Allocation runs persisted as one directory per run key.
+
+    Every column is a .npy file, loaded memory-mapped, so a repeat
+    request maps the stored columns instead of recomputing or copying
+    them; categorical columns are stored as their codes. meta.json holds
+    the run parameters, the column layout, the solver details and the
+    capital spent, which is all list() reads. Runs are evicted least
+    recently used first once the store exceeds max_bytes.
+
+    Sessions and processes share one store: runs are renamed into place
+    and out of it whole, writes and evictions in this process take a lock,
+    and readers skip runs that disappear while they scan.
+    """
+
+    def __init__(self, directory=STORE_DIR, max_bytes=1024 * 2 ** 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+
+    def _path(self, key, name=None):
+        path = os.path.join(self.directory, key)
+        return path if name is None else os.path.join(path, name)
+
+    def __contains__(self, key):
+        return os.path.isfile(self._path(key, "meta.json"))
+
+    def meta(self, key):
+        with open(self._path(key, "meta.json")) as f:
+            return json.load(f)
+
+    @traced("results_store.put")
+    def put(self, key, df, spent, **params):
+        """
+        Stores a results table (as allocate() or run_allocation() return
+        it) with the capital spent and the run parameters. Keys identify
+        their inputs, so a run another writer stored first is kept.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix=f"{key}.", suffix=".tmp")
+
+        columns = []
+        for i, (name, values) in enumerate(df.items()):
+            column = {"name": name, "file": f"{i}.npy"}
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                column["categories"] = values.cat.categories.tolist()
+                column["ordered"] = bool(values.cat.ordered)
+                array = values.cat.codes.to_numpy()
+            elif values.dtype.kind in "biufcM":
+                array = values.to_numpy()
+            else:
+                # stored as fixed-width strings, read back as the original dtype
+                column["dtype"] = str(values.dtype)
+                array = values.to_numpy().astype(str)
+            np.save(os.path.join(tmp, column["file"]), array, allow_pickle=False)
+            columns.append(column)
+
+        meta = {
+            "key": key,
+            "created": time.time(),
+            "rows": len(df),
+            "spent": float(spent),
+            "params": _plain(params),
+            "allocation": _plain(df.attrs.get("allocation", {})),
+            "columns": columns,
+        }
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2, default=repr)
+
+        with self._lock:
+            try:
+                os.rename(tmp, self._path(key))
+            except OSError as exc:
+                shutil.rmtree(tmp, ignore_errors=True)
+                # the target exists: already stored by another writer
+                if exc.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                    raise
+                return
+            count("results_store.put")
+            self._evict()
+
+    @traced("results_store.get")
+    def get(self, key):
+        """
+        (df, spent) for a stored run, or None, with the stored columns'
+        dtypes. Numeric and categorical columns are read-only
+        memory-mapped views of the stored files.
+        """
+        try:
+            meta = self.meta(key)
+            columns = {}
+            for column in meta["columns"]:
+                # a plain ndarray view of the map: still backed by the file
+                array = np.load(self._path(key, column["file"]), mmap_mode="r").view(np.ndarray)
+                if "categories" in column:
+                    array = pd.Categorical.from_codes(
+                        array, column["categories"], ordered=column.get("ordered", False)
+                    )
+                elif "dtype" in column:
+                    array = pd.Series(array).astype(column["dtype"])
+                columns[column["name"]] = array
+            os.utime(self._path(key))
+        except (OSError, ValueError, KeyError):
+            count("results_store.miss")
+            return None
+
+        count("results_store.hit")
+        df = pd.DataFrame(columns, copy=False)
+        df.attrs["allocation"] = meta["allocation"]
+        return df, meta["spent"]
+
+    def list(self):
+        """One row per stored run, most recently used first, from meta.json only"""
+        rows = []
+        for key in self._keys():
+            try:
+                meta = self.meta(key)
+                used, size = os.path.getmtime(self._path(key)), self._size(key)
+            except (OSError, ValueError):
+                # evicted while listing
+                continue
+            rows.append({
+                "Key": key,
+                **{PARAM_LABELS.get(k, k.replace("_", " ").title()): v
+                   for k, v in meta["params"].items()},
+                "Rows": meta["rows"],
+                "Spent": meta["spent"],
+                "Value": meta["allocation"].get("value"),
+                "Created": pd.Timestamp(meta["created"], unit="s"),
+                "Used": pd.Timestamp(used, unit="s"),
+                "Bytes": size,
+            })
+        runs = pd.DataFrame(rows)
+        return runs.sort_values("Used", ascending=False, ignore_index=True) if rows else runs
+
+    def latest(self, keys=None):
+        """Key of the most recently used run, of all or only of keys, or None"""
+        used = self._used(self._keys() if keys is None else keys)
+        return max(used, key=used.get, default=None)
+
+    @traced("results_store.diff")
+    def diff(self, key_a, key_b, on="Project_ID"):
+        """
+        Projects whose decision differs between two stored runs, with
+        their NPV and Score in each, plus projects only in one run.
+        """
+        runs = []
+        for key in (key_a, key_b):
+            stored = self.get(key)
+            if stored is None:
+                raise KeyError(f"No stored run {key}")
+            runs.append(stored[0])
+
+        a, b = (df[[c for c in (on, "NPV", "Score", "Decision") if c in df]] for df in runs)
+        merged = a.merge(b, on=on, how="outer", suffixes=(" (a)", " (b)"), indicator=True)
+        decision_a = merged["Decision (a)"].astype(object)
+        decision_b = merged["Decision (b)"].astype(object)
+        changed = (merged["_merge"] != "both") | (decision_a != decision_b)
+        merged = merged[changed.to_numpy()].drop(columns="_merge").reset_index(drop=True)
+        if "NPV (a)" in merged and "NPV (b)" in merged:
+            merged["NPV Δ"] = merged["NPV (b)"] - merged["NPV (a)"]
+        return merged
+
+    def delete(self, key):
+        """Removes a run; it is renamed away first, so readers never see it half deleted"""
+        doomed = self._path(f"{key}.{uuid.uuid4().hex}.tmp")
+        try:
+            os.rename(self._path(key), doomed)
+        except OSError:
+            return
+        shutil.rmtree(doomed, ignore_errors=True)
+
+    def clear(self):
+        for key in self._keys():
+            self.delete(key)
+
+    def _keys(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return [
+            name for name in os.listdir(self.directory)
+            if not name.endswith(".tmp") and os.path.isdir(self._path(name))
+        ]
+
+    def _size(self, key):
+        path = self._path(key)
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+    def _used(self, keys):
+        """Last-use time of each stored run among keys; runs that vanish are skipped"""
+        used = {}
+        for key in keys:
+            try:
+                if key in self:
+                    used[key] = os.path.getmtime(self._path(key))
+            except OSError:
+                pass
+        return used
+
+    def _evict(self):
+        """Drops least recently used runs until the store is within max_bytes"""
+        with self._lock:
+            entries = []
+            for key, used in self._used(self._keys()).items():
+                try:
+                    entries.append((used, self._size(key), key))
+                except OSError:
+                    pass
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            for _, size, key in entries:
+                if total <= self.max_bytes:
+                    break
+                self.delete(key)
+                count("results_store.evicted")
+                total -= size
+
+
+default_store = ResultsStore()
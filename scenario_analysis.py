@@ -1,3 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation import count, traced
+
+SHOCK_FACTORS = ("revenue", "cost", "growth", "inflation")
+
+# Annual shock volatilities and their correlation (order of SHOCK_FACTORS)
+DEFAULT_VOLATILITY = np.array([0.10, 0.06, 0.02, 0.015])
+DEFAULT_CORRELATION = np.array([
+    [1.00, 0.50, 0.30, -0.20],
+    [0.50, 1.00, 0.10, 0.60],
+    [0.30, 0.10, 1.00, -0.10],
+    [-0.20, 0.60, -0.10, 1.00],
+])
+
+
+# Revenue and operating-cost multipliers of the named scenarios
+SCENARIOS = {
+    "Base": (1.00, 1.00),
+    "Best": (1.15, 1.00),
+    "Worst": (0.80, 1.10),
+}
+
+
 def apply_scenario(revenue, cost, scenario):
     """
     Applies macroeconomic scenario shocks.
@@ -8,11 +33,138 @@ def apply_scenario(revenue, cost, scenario):
     Worst Case:
     - Revenue -20%
     - Cost +10%
+
+    scenario may also be a (revenue factor, cost factor) shock set.
+    """
+    if isinstance(scenario, str):
+        scenario = SCENARIOS.get(scenario, SCENARIOS["Base"])
+    revenue_factor, cost_factor = scenario
+
+    return revenue * revenue_factor, cost * cost_factor
+
+
+def scenario_shocks(scenarios):
+    """
+    Name -> (revenue factor, cost factor) for a list of SCENARIOS names
+    or a dict that mixes names and user-defined shock sets.
+    """
+    if not isinstance(scenarios, dict):
+        scenarios = dict.fromkeys(scenarios)
+    shocks = {}
+    for name, factors in scenarios.items():
+        if factors is None:
+            if name not in SCENARIOS:
+                raise ValueError(f"Unknown scenario {name!r}; pass its (revenue, cost) factors")
+            factors = SCENARIOS[name]
+        shocks[name] = tuple(float(f) for f in factors)
+    return shocks
+
+
+def _quantile(counts, edges, q):
+    """
+    Per-row quantile from histogram counts, interpolating within bins.
     """
-    if scenario == "Best":
-        revenue *= 1.15
-    elif scenario == "Worst":
-        revenue *= 0.80
-        cost *= 1.10
+    cum = np.cumsum(counts, axis=1)
+    target = q * cum[:, -1]
+    b = np.minimum((cum < target[:, None]).sum(axis=1), counts.shape[1] - 1)
+    rows = np.arange(len(counts))
+    below = np.where(b > 0, cum[rows, np.maximum(b - 1, 0)], 0)
+    frac = (target - below) / np.maximum(counts[rows, b], 1)
+    return edges[rows, b] + frac * (edges[rows, b + 1] - edges[rows, b]), b, frac
+
+
+@traced("scenario_analysis.simulate_npv")
+def simulate_npv(investments, lives, base_revenue, base_cost, scenario, wacc,
+                 n_paths=10_000, chunk_size=10_000, seed=None, growth=0.04,
+                 volatility=DEFAULT_VOLATILITY, correlation=DEFAULT_CORRELATION,
+                 alpha=0.05, bins=512):
+    """
+    Monte Carlo NPV distribution per project.
+
+    Draws correlated annual revenue, cost, growth and inflation shocks
+    around the scenario's central case for n_paths x projects x years,
+    in chunks of chunk_size paths. Only running sums and fixed-width
+    histograms are kept between chunks, so memory is bounded by the chunk
+    size. Results are reproducible for a given seed and chunk size.
+
+    Returns one row per project with the NPV mean, standard deviation,
+    P5/P95, Value-at-Risk and Conditional VaR at level alpha (as losses)
+    and the probability of a negative NPV.
+    """
+    investments = np.asarray(investments, dtype=float)
+    lives = np.asarray(lives, dtype=int)
+    revenue, cost = apply_scenario(
+        np.array(base_revenue, dtype=float),
+        np.array(base_cost, dtype=float),
+        scenario
+    )
+    revenue = np.broadcast_to(revenue, lives.shape)
+    cost = np.broadcast_to(cost, lives.shape)
+
+    rng = np.random.default_rng(seed)
+    chol = np.linalg.cholesky(correlation) * np.asarray(volatility)[:, None]
+    n_projects = len(lives)
+    years = np.arange(1, lives.max(initial=0) + 1)
+    mask = years[None, :] <= lives[:, None]
+    discount = (1 + wacc) ** -years.astype(float)
+
+    total = total_sq = losses = 0.0
+    counts = sums = edges = None
+    offsets = np.arange(n_projects)[:, None] * bins
+
+    for start in range(0, n_paths, chunk_size):
+        size = min(chunk_size, n_paths - start)
+        count("monte_carlo.paths", size)
+        shocks = rng.standard_normal((size, n_projects, len(years), 4)) @ chol.T
+
+        growth_path = np.cumprod(1 + growth + shocks[..., 2], axis=2)
+        inflation_path = np.cumprod(1 + shocks[..., 3], axis=2)
+        cf = (
+            revenue[:, None] * (1 + shocks[..., 0])
+            - cost[:, None] * (1 + shocks[..., 1]) * inflation_path
+        ) * growth_path
+        npv = (cf * mask) @ discount - investments
+        del shocks, growth_path, inflation_path, cf
+
+        if edges is None:
+            lo, hi = npv.min(axis=0), npv.max(axis=0)
+            pad = np.maximum(hi - lo, 1e-9)
+            edges = np.linspace(lo - pad, hi + pad, bins + 1, axis=1)
+            counts = np.zeros(n_projects * bins)
+            sums = np.zeros(n_projects * bins)
+
+        width = edges[:, -1] - edges[:, 0]
+        idx = ((npv - edges[:, 0]) / width * bins).astype(np.int64)
+        idx = (np.clip(idx, 0, bins - 1).T + offsets).ravel()
+        counts += np.bincount(idx, minlength=n_projects * bins)
+        sums += np.bincount(idx, weights=npv.T.ravel(), minlength=n_projects * bins)
+
+        total = total + npv.sum(axis=0)
+        total_sq = total_sq + (npv ** 2).sum(axis=0)
+        losses = losses + (npv < 0).sum(axis=0)
+
+    counts = counts.reshape(n_projects, bins)
+    sums = sums.reshape(n_projects, bins)
+    mean = total / n_paths
+    std = np.sqrt(np.maximum(total_sq / n_paths - mean ** 2, 0.0))
+
+    p5, _, _ = _quantile(counts, edges, 0.05)
+    p95, _, _ = _quantile(counts, edges, 0.95)
+    var_q, b, frac = _quantile(counts, edges, alpha)
+
+    # Tail mean: whole bins below the VaR bin plus the matching share of it
+    rows = np.arange(n_projects)
+    tail_sum = np.where(np.arange(bins)[None, :] < b[:, None], sums, 0).sum(axis=1)
+    tail_sum += np.minimum(frac, 1) * sums[rows, b]
+    tail_count = np.where(np.arange(bins)[None, :] < b[:, None], counts, 0).sum(axis=1)
+    tail_count += np.minimum(frac, 1) * counts[rows, b]
 
-    return revenue, cost
+    return pd.DataFrame({
+        "NPV_Mean": mean,
+        "NPV_Std": std,
+        "NPV_P5": p5,
+        "NPV_P95": p95,
+        "VaR": -var_q,
+        "CVaR": -tail_sum / np.maximum(tail_count, 1e-12),
+        "Prob_Loss": losses / n_paths
+    })
@@ -0,0 +1,28 @@
+"""
+Synthetic generators: the rows drawn for a seed do not depend on the
+chunk size they are yielded in.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from data_generation import CATALOG_BLOCK, PANEL_BLOCK, iter_historical_panel, iter_project_catalog
+
+
+@pytest.mark.parametrize("chunk_size", [1, 700, PANEL_BLOCK + 1])
+def test_panel_rows_independent_of_chunk_size(chunk_size):
+    n = 2 * PANEL_BLOCK + 50
+    whole = pd.concat(iter_historical_panel(n, seed=3, chunk_size=n), ignore_index=True)
+    chunked = pd.concat(iter_historical_panel(n, seed=3, chunk_size=chunk_size), ignore_index=True)
+    pd.testing.assert_frame_equal(chunked, whole)
+
+
+def test_catalog_rows_independent_of_chunk_size():
+    n = 2 * CATALOG_BLOCK + 50
+    whole = pd.concat(iter_project_catalog(n, seed=3, chunk_size=n), ignore_index=True)
+    chunked = pd.concat(iter_project_catalog(n, seed=3, chunk_size=999), ignore_index=True)
+    pd.testing.assert_frame_equal(chunked, whole)
@@ -0,0 +1,115 @@
+"""
+IRR regression corpus: irr_batch and geometric_irr against numpy_financial.irr.
+
+tests/data/irr_corpus.csv holds cash-flow rows (time 0 first, padded
+with empty cells) with the rate npf.irr gave when the corpus was built
+(empty where it finds no root). It covers the app's geometric flows over
+investment / margin ratios from 1e-6 to 1e6, IRRs far above the 10,000%
+top of the bracketing grid and close to -100%, random conventional
+flows, flows with a terminal outflow, and rows with no root.
+
+Rebuild with `python tests/test_irr_corpus.py`.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import numpy_financial as npf
+import pandas as pd
+import pytest
+
+from financial_metrics import geometric_irr, irr_batch
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "irr_corpus.csv")
+GROWTH = 0.04
+
+
+def _close(rates, expected, rtol=1e-6):
+    both_nan = np.isnan(rates) & np.isnan(expected)
+    return both_nan | (np.abs(rates - expected) <= rtol * (1 + np.abs(expected)))
+
+
+def build_corpus(seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+
+    # the app's flows: margin * 1.04**i over the project life, extreme ratios included
+    for margin in (-5.0, 0.5, 73.0, 500.0):
+        for life in (1, 2, 5, 10, 20):
+            for investment in np.geomspace(1e-4, 1e5, 10):
+                flows = margin * (1 + GROWTH) ** np.arange(1, life + 1)
+                rows.append(("geometric", np.r_[-investment, flows]))
+
+    for _ in range(150):
+        life = int(rng.integers(1, 21))
+        rows.append(("conventional", np.r_[-rng.uniform(1, 500), rng.uniform(0, 80, life)]))
+
+    # decommissioning cost at the end of the life
+    for _ in range(50):
+        life = int(rng.integers(3, 16))
+        flows = rng.uniform(5, 60, life)
+        flows[-1] = -rng.uniform(0, 40)
+        rows.append(("terminal_outflow", np.r_[-rng.uniform(10, 200), flows]))
+
+    for _ in range(10):
+        rows.append(("no_root", rng.uniform(1, 50, int(rng.integers(2, 10)))))
+
+    width = max(len(flows) for _, flows in rows)
+    table = pd.DataFrame(
+        [np.r_[flows, np.full(width - len(flows), np.nan)] for _, flows in rows],
+        columns=[f"c{t}" for t in range(width)]
+    )
+    table.insert(0, "kind", [kind for kind, _ in rows])
+    table["irr"] = [npf.irr(flows) for _, flows in rows]
+    return table
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return pd.read_csv(CORPUS)
+
+
+def _flows(corpus):
+    return corpus.filter(regex=r"^c\d+$").to_numpy(dtype=float)
+
+
+def test_corpus_matches_numpy_financial(corpus):
+    """The stored rates are what npf.irr gives today"""
+    flows = _flows(corpus)
+    live = np.array([npf.irr(row[~np.isnan(row)]) for row in flows])
+    assert _close(live, corpus["irr"].to_numpy(dtype=float)).all()
+
+
+def test_irr_batch_matches_corpus(corpus):
+    rates, converged = irr_batch(_flows(corpus))
+    expected = corpus["irr"].to_numpy(dtype=float)
+    bad = ~_close(rates, expected)
+    assert not bad.any(), corpus.loc[bad, ["kind", "irr"]].assign(batch=rates[bad])
+    assert (converged == ~np.isnan(expected)).all()
+
+
+def test_geometric_irr_matches_corpus(corpus):
+    rows = corpus[corpus["kind"] == "geometric"]
+    flows = _flows(rows)
+    lives = (~np.isnan(flows[:, 1:])).sum(axis=1)
+    margins = flows[:, 1] / (1 + GROWTH)
+    rates, _ = geometric_irr(-flows[:, 0], margins, GROWTH, lives)
+    expected = rows["irr"].to_numpy(dtype=float)
+    bad = ~_close(rates, expected)
+    assert not bad.any(), rows.loc[bad, ["irr"]].assign(geometric=rates[bad])
+
+
+def test_irr_above_grid_is_solved():
+    """A ₹0.5 Cr project at revenue 165 / cost 92 returns over 15,000%"""
+    flows = np.r_[-0.5, 73.0 * (1 + GROWTH) ** np.arange(1, 6)]
+    rates, converged = irr_batch(flows)
+    assert converged[0]
+    assert rates[0] == pytest.approx(npf.irr(flows), rel=1e-8)
+
+
+if __name__ == "__main__":
+    os.makedirs(os.path.dirname(CORPUS), exist_ok=True)
+    build_corpus().to_csv(CORPUS, index=False, float_format="%.17g")
+    print(f"wrote {CORPUS}")
@@ -0,0 +1,72 @@
+"""
+ResultsStore shared by concurrent sessions: puts, reads and listings
+while other threads evict runs.
+"""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from results_store import ResultsStore
+
+
+def _run(seed, rows=2000):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Project_ID": [f"P{i}" for i in range(rows)],
+        "NPV": rng.normal(size=rows),
+    })
+    return df, float(rng.uniform(0, 100))
+
+
+def test_concurrent_put_get_list_with_eviction(tmp_path):
+    # room for about three runs, so nearly every put evicts
+    store = ResultsStore(str(tmp_path), max_bytes=3 * 40_000)
+    runs = {f"k{i}": _run(i) for i in range(12)}
+    errors = []
+
+    def session(worker):
+        try:
+            for step in range(30):
+                key = f"k{(worker + step) % len(runs)}"
+                store.put(key, *runs[key], scenario="Base")
+                stored = store.get(key)
+                if stored is not None:
+                    pd.testing.assert_frame_equal(stored[0], runs[key][0])
+                store.list()
+                store.latest()
+                store.latest([key])
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+    assert store.list()["Bytes"].sum() <= store.max_bytes
+
+
+def test_put_keeps_a_run_already_stored(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    df, spent = _run(0)
+    store.put("k", df, spent)
+    store.put("k", df.iloc[:10], 0.0)
+    stored, stored_spent = store.get("k")
+    assert len(stored) == len(df) and stored_spent == spent
+
+
+def test_get_restores_dtypes(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    df, spent = _run(0, rows=50)
+    df["Label"] = pd.Series(["a" * 40] * 50, dtype=object)
+    df["Decision"] = pd.Categorical(["Selected"] * 50, categories=["Rejected", "Selected"], ordered=True)
+    store.put("k", df, spent)
+    assert store.get("k")[0].equals(df)
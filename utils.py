@@ -1,5 +1,10 @@
+import time
+from contextlib import contextmanager
+
 import numpy as np
 
+from instrumentation import span
+
 def safe_divide(a, b):
     """Avoid division by zero"""
     return a / b if b != 0 else 0
@@ -7,3 +12,13 @@ def safe_divide(a, b):
 def format_currency(value):
     """Format values in ₹ Crore"""
     return f"₹ {value:,.2f} Cr"
+
+@contextmanager
+def stage_timer(timings, stage):
+    """Record the wall-clock seconds of a block under timings[stage] (and as a span)"""
+    start = time.perf_counter()
+    try:
+        with span(stage):
+            yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start